@@ -0,0 +1,238 @@
+# Vectorized modular arithmetic over many operands under one modulus
+#
+# Usage:
+#   results = batch_powmod(["12", "34", "56"], exponent, modulus)
+#   results = batch_powmod(["12", "34", "56"], ["7", "8", "9"], modulus)
+#   products = batch_mulmod(values, shared_key, modulus)
+#
+# Needs NumPy; everything else in the project works without it.
+
+from functools import lru_cache
+from symoblic_arithmetic import get_modulus_context, string_divide, choose_window_size, _window_schedule, _exponent_bits
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Operands are rows of base 10^6 limbs in int64. Limb products stay below 10^12,
+# so a column of a schoolbook product can sum millions of them without overflow.
+BATCH_LIMB_DIGITS = 6
+BATCH_LIMB_BASE = 10 ** BATCH_LIMB_DIGITS
+
+# Helper function: fail clearly without NumPy
+def _require_numpy():
+    if np is None:
+        raise ImportError("The vectorized batch backend needs NumPy; install it with 'pip install numpy'.")
+
+# Helper function: number of limbs in a decimal string
+def _limb_count(num_str):
+    return max(1, (len(num_str.lstrip("0")) + BATCH_LIMB_DIGITS - 1) // BATCH_LIMB_DIGITS)
+
+# Helper function: decimal strings to a 2-D limb array
+def _to_rows(values, width):
+    rows = np.zeros((len(values), width), dtype=np.int64)
+    for r, value in enumerate(values):
+        for i, end in enumerate(range(len(value), 0, -BATCH_LIMB_DIGITS)):
+            rows[r, i] = int(value[max(end - BATCH_LIMB_DIGITS, 0):end])
+    return rows
+
+# Helper function: a 2-D limb array to decimal strings
+def _from_rows(rows):
+    values = []
+    for row in rows.tolist():
+        top = len(row) - 1
+        while top > 0 and row[top] == 0:
+            top -= 1
+        values.append(str(row[top]) + "".join(["%06d" % limb for limb in reversed(row[:top])]))
+    return values
+
+# Helper function: propagate carries along every row
+def _normalize(x):
+    """
+    Brings every limb of every row into [0, 10^6). Rows may hold negative limbs;
+    returns (limbs, carry out of the top limb), the carry being negative for a
+    negative row.
+    """
+    out = np.empty_like(x)
+    carry = np.zeros(x.shape[0], dtype=np.int64)
+    for i in range(x.shape[1]):
+        carry, out[:, i] = np.divmod(x[:, i] + carry, BATCH_LIMB_BASE)
+    return out, carry
+
+# Helper function: row-wise schoolbook product
+def _mul(a, b, limit=None):
+    """
+    Multiplies the rows of a by the rows of b (or by a single broadcast row) and
+    returns normalized limbs. With limit only the low limit limbs are formed.
+    Each step multiplies a whole column of limbs across every row at once.
+    """
+    width = a.shape[1] + b.shape[1]
+    if limit is not None:
+        width = min(width, limit)
+    result = np.zeros((max(a.shape[0], b.shape[0]), width), dtype=np.int64)
+    for i in range(min(b.shape[1], width)):
+        span = min(a.shape[1], width - i)
+        result[:, i:i + span] += a[:, :span] * b[:, i:i + 1]
+    return _normalize(result)[0]
+
+class BatchModulusContext:
+    """
+    Barrett reduction under a fixed modulus applied to many operands in lockstep.
+    Each row of a 2-D array is one operand; every multiplication, reduction and
+    exponentiation step is a handful of NumPy operations over all rows, so the
+    interpreter overhead is paid once per step instead of once per operand.
+    """
+
+    def __init__(self, modulus):
+        _require_numpy()
+        self.context = get_modulus_context(modulus)
+        self.modulus = self.context.modulus
+        self._k = _limb_count(self.modulus)
+        self._m = _to_rows([self.modulus], self._k + 1)
+
+        # mu = floor(base^(2k) / m)
+        mu = string_divide("1" + "0" * (2 * self._k * BATCH_LIMB_DIGITS), self.modulus)
+        self._mu = _to_rows([mu], _limb_count(mu))
+
+    def _to_rows(self, values):
+        """Decimal strings to rows of k limbs, reduced modulo the modulus."""
+        limit = 2 * self._k * BATCH_LIMB_DIGITS
+        values = [value if len(value) <= limit else self.context.reduce(value) for value in values]
+        width = max([2 * self._k] + [_limb_count(value) for value in values])
+        return self._reduce(_to_rows(values, width))
+
+    def _reduce(self, x):
+        """Reduces rows below base^(2k) modulo the modulus; returns rows of k limbs."""
+        k = self._k
+        if x.shape[1] < 2 * k:
+            x = np.pad(x, ((0, 0), (0, 2 * k - x.shape[1])))
+
+        # q3 = floor(floor(x / base^(k-1)) * mu / base^(k+1))
+        q3 = _mul(x[:, k - 1:], self._mu)[:, k + 1:]
+
+        # r = (x - q3 * m) mod base^(k+1)
+        r, _ = _normalize(x[:, :k + 1] - _mul(q3, self._m, limit=k + 1))
+
+        # At most two corrective subtractions are needed
+        for _ in range(2):
+            difference, carry = _normalize(r - self._m)
+            r = np.where((carry >= 0)[:, None], difference, r)
+        return r[:, :k]
+
+    def _mulmod(self, a, b):
+        return self._reduce(_mul(a, b))
+
+    def _powmod(self, bases, exp, window=None, cache=False):
+        """Sliding-window exponentiation of every row by one shared exponent."""
+        window, steps = _window_schedule(exp, window, cache)
+        if not steps:
+            one = np.zeros_like(bases)
+            one[:, 0] = 1 if self.modulus != "1" else 0
+            return one
+
+        odd_powers = [bases]
+        if window > 1:
+            bases_squared = self._mulmod(bases, bases)
+            for _ in range((1 << (window - 1)) - 1):
+                odd_powers.append(self._mulmod(odd_powers[-1], bases_squared))
+
+        result = odd_powers[steps[0][1] >> 1]
+        for squarings, value in steps[1:]:
+            for _ in range(squarings):
+                result = self._mulmod(result, result)
+            if value:
+                result = self._mulmod(result, odd_powers[value >> 1])
+        return result
+
+    def _powmod_each(self, bases, exps, window=None):
+        """
+        Fixed-window exponentiation of every row by its own exponent. All rows
+        share one chain of squarings; after each run of window squarings every
+        row is multiplied by the power of its base that its own exponent's next
+        window selects from a per-row table of base^0 ... base^(2^window - 1).
+        """
+        rows = np.arange(bases.shape[0])
+        one = np.zeros_like(bases)
+        one[:, 0] = 1 if self.modulus != "1" else 0
+
+        bits = [_exponent_bits(exp) for exp in exps]
+        length = max(len(row_bits) for row_bits in bits)
+        if length == 0:
+            return one
+        if window is None:
+            window = choose_window_size(length)
+
+        # digits[j, r] = window j of row r's exponent, most significant first
+        length += -length % window
+        weights = 1 << np.arange(window - 1, -1, -1, dtype=np.int64)
+        digits = np.stack([np.array((0,) * (length - len(row_bits)) + row_bits, dtype=np.int64).reshape(-1, window) @ weights for row_bits in bits], axis=1)
+
+        # table[i] holds base^i for every row
+        powers = [one, bases]
+        for _ in range((1 << window) - 2):
+            powers.append(self._mulmod(powers[-1], bases))
+        table = np.stack(powers)
+
+        result = table[digits[0], rows]
+        for row_digits in digits[1:]:
+            for _ in range(window):
+                result = self._mulmod(result, result)
+            result = self._mulmod(result, table[row_digits, rows])
+        return result
+
+    def mulmod(self, a_values, b_values):
+        """
+        Returns [(a * b) % modulus] for paired lists of decimal strings. b_values
+        may also be a single string multiplying every a.
+        """
+        if not a_values:
+            return []
+        b_rows = self._to_rows([b_values] if isinstance(b_values, str) else b_values)
+        return _from_rows(self._mulmod(self._to_rows(a_values), b_rows))
+
+    def powmod(self, bases, exp, window=None, cache=False):
+        """
+        Returns [(base^exp) % modulus for base in bases] as decimal strings. exp
+        may also be a list with one exponent per base. cache=True keeps a shared
+        exponent's window schedule, as in ModulusContext.powmod.
+        """
+        if not bases:
+            return []
+        if not isinstance(exp, str):
+            if len(exp) != len(bases):
+                raise ValueError("Need one exponent per base.")
+            return _from_rows(self._powmod_each(self._to_rows(bases), exp, window))
+        return _from_rows(self._powmod(self._to_rows(bases), exp, window, cache))
+
+# Function to get a cached batch context
+@lru_cache(maxsize=16)
+def get_batch_context(mod):
+    """Returns a BatchModulusContext for mod, reusing the one built on a previous call."""
+    return BatchModulusContext(mod)
+
+# Function to multiply many operands under one modulus
+def batch_mulmod(a_values, b_values, mod):
+    """
+    Computes [(a * b) % mod] for paired lists of decimal strings, vectorized with
+    NumPy. b_values may be a single string applied to every a.
+    """
+    return get_batch_context(mod).mulmod(list(a_values), b_values if isinstance(b_values, str) else list(b_values))
+
+# Function to exponentiate many operands under one modulus
+def batch_powmod(bases, exp, mod, window=None, cache=False):
+    """
+    Computes [(base^exp) % mod for base in bases] in lockstep, vectorized with
+    NumPy. exp may be a single string or a list with one exponent per base.
+    """
+    return get_batch_context(mod).powmod(list(bases), exp if isinstance(exp, str) else list(exp), window, cache)
+
+# Helper function: split a flat result list back into per-message groups
+def regroup(values, groups):
+    """Returns lists of consecutive values with the same lengths as the lists in groups."""
+    result = []
+    start = 0
+    for group in groups:
+        result.append(values[start:start + len(group)])
+        start += len(group)
+    return result
@@ -0,0 +1,196 @@
+# Benchmarks for the symbolic arithmetic primitives and the protocols built on them
+#
+# Usage:
+#   python benchmark.py --output results.json
+#   python benchmark.py --compare results.json --tolerance 0.15
+#
+# Operands come from a seeded generator, so two runs with the same seed time the same inputs.
+# The seed is recorded in the report, and --compare reuses the baseline's seed.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from symoblic_arithmetic import string_add, string_multiply, string_divide, string_mod, string_mod_inverse, string_modular_exponentiation, string_multi_modular_exponentiation, string_dual_modular_exponentiation, fixed_base_powmod
+from diffie_hellman import diffie_hellman_key_exchange_string
+from rsa import generate_rsa_keys, rsa_encrypt, rsa_decrypt
+from el_gamal import elgamal_encrypt_string_with_shared_key, elgamal_decrypt_string_with_shared_key
+
+DEFAULT_SIZES = [64, 128, 256, 512, 1024, 2048, 4096]
+
+# Each measurement repeats a call until it has run for at least this long
+MIN_SAMPLE_TIME = 0.05
+
+# Protocol parameters, the same as in the example programs
+DH_G = "5"
+DH_P = "15234745201463007706558111083071717085392259682287044574142794675291425649677126470685490446237419785664197470483041493246021879373950819965360084406516123"
+RSA_P = DH_P
+RSA_Q = "8386506700653187088114129336508517833941752817092037266701121132685842239715196576751226666314102366205376660890913822464516288805181874490066037489054359"
+RSA_E = "17"
+PLAINTEXT = "HELLO, BENCHMARK"
+
+# Seed of the operand generator when neither --seed nor a baseline gives one
+DEFAULT_SEED = 20240101
+
+# Helper function: random operand of an exact bit length
+def random_operand(rng, bits):
+    """Returns a decimal string with exactly the given number of bits, drawn from the random.Random rng."""
+    return str(rng.getrandbits(bits) | (1 << (bits - 1)))
+
+# Helper function: random exponent in [1, p-2]
+def _random_exponent(rng, p):
+    return str(rng.randrange(1, int(p) - 1))
+
+# Helper function: time one call
+def measure(function, repeat):
+    """Returns the best seconds-per-call over repeat samples."""
+    best = None
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_TIME:
+                break
+        per_call = elapsed / calls
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+# Helper function: invertible operand
+def _invertible_pair(rng, bits):
+    while True:
+        a, mod = random_operand(rng, bits), random_operand(rng, bits)
+        try:
+            string_mod_inverse(a, mod)
+            return a, mod
+        except ValueError:
+            continue
+
+# Function to build the primitive benchmarks
+def primitive_benchmarks(sizes, rng):
+    """Returns {name: zero-argument callable} for every primitive and operand size, with operands from rng."""
+    cases = {}
+    for bits in sizes:
+        a, b = random_operand(rng, bits), random_operand(rng, bits)
+        wide = random_operand(rng, 2 * bits)
+        inv_a, inv_mod = _invertible_pair(rng, bits)
+        exponent, other_exponent = random_operand(rng, bits), random_operand(rng, bits)
+
+        cases[f"string_add/{bits}"] = lambda a=a, b=b: string_add(a, b)
+        cases[f"string_multiply/{bits}"] = lambda a=a, b=b: string_multiply(a, b)
+        cases[f"string_divide/{bits}"] = lambda wide=wide, b=b: string_divide(wide, b)
+        cases[f"string_mod/{bits}"] = lambda wide=wide, b=b: string_mod(wide, b)
+        cases[f"string_mod_inverse/{bits}"] = lambda a=inv_a, mod=inv_mod: string_mod_inverse(a, mod)
+        cases[f"string_modular_exponentiation/{bits}"] = lambda a=a, e=exponent, mod=b: string_modular_exponentiation(a, e, mod)
+        cases[f"string_multi_modular_exponentiation/{bits}"] = lambda a=a, c=wide, e=exponent, mod=b: string_multi_modular_exponentiation([a, c], e, mod)
+        cases[f"string_dual_modular_exponentiation/{bits}"] = lambda a=a, c=wide, x=exponent, y=other_exponent, mod=b: string_dual_modular_exponentiation(a, x, c, y, mod)
+    return cases
+
+# Function to build the protocol benchmarks
+def protocol_benchmarks(rng):
+    """Returns {name: zero-argument callable} for end-to-end protocol runs, with secrets from rng."""
+    a, b = _random_exponent(rng, DH_P), _random_exponent(rng, DH_P)
+    x, y = _random_exponent(rng, DH_P), _random_exponent(rng, DH_P)
+    shared_key = diffie_hellman_key_exchange_string(DH_G, DH_P, a, b)
+    public_key, private_key = generate_rsa_keys(RSA_P, RSA_Q, RSA_E)
+    g_a = fixed_base_powmod(DH_G, a, DH_P)
+
+    def dh_handshake():
+        diffie_hellman_key_exchange_string(DH_G, DH_P, x, y)
+
+    def rsa_round_trip():
+        rsa_decrypt(rsa_encrypt(PLAINTEXT, public_key, shared_key), private_key, shared_key)
+
+    def elgamal_round_trip():
+        ciphertext = elgamal_encrypt_string_with_shared_key(PLAINTEXT, DH_P, DH_G, g_a, b, shared_key)
+        elgamal_decrypt_string_with_shared_key(ciphertext, DH_P, a, shared_key)
+
+    return {
+        "dh_handshake/512": dh_handshake,
+        "rsa_round_trip/1024": rsa_round_trip,
+        "elgamal_round_trip/512": elgamal_round_trip,
+    }
+
+# Function to run the benchmarks
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, protocols=True, log=None, seed=DEFAULT_SEED):
+    """Runs all benchmarks on operands drawn from random.Random(seed) and returns the JSON-serializable report."""
+    rng = random.Random(seed)
+    cases = primitive_benchmarks(sizes, rng)
+    if protocols:
+        cases.update(protocol_benchmarks(rng))
+
+    results = {}
+    for name, function in cases.items():
+        results[name] = measure(function, repeat)
+        if log:
+            log(f"{name:45s} {results[name] * 1e6:14.1f} us")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+# Function to compare against a baseline
+def compare_reports(current, baseline, tolerance):
+    """
+    Compares two reports. Returns a list of (name, baseline seconds, current seconds, ratio)
+    for every benchmark that became slower by more than tolerance (0.15 = 15%).
+    """
+    regressions = []
+    for name, seconds in current["results"].items():
+        before = baseline["results"].get(name)
+        if before:
+            ratio = seconds / before
+            if ratio > 1 + tolerance:
+                regressions.append((name, before, seconds, ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the symbolic arithmetic primitives and protocols.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="operand sizes in bits")
+    parser.add_argument("--repeat", type=int, default=3, help="samples per benchmark (best is kept)")
+    parser.add_argument("--no-protocols", action="store_true", help="skip the end-to-end protocol benchmarks")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging a regression")
+    parser.add_argument("--seed", type=int, help=f"operand seed (default: the baseline's seed with --compare, else {DEFAULT_SEED})")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    seed = args.seed
+    if seed is None:
+        # Time the same operands as the baseline did
+        seed = baseline["meta"].get("seed", DEFAULT_SEED) if baseline else DEFAULT_SEED
+
+    report = run_benchmarks(args.sizes, args.repeat, not args.no_protocols, log=print, seed=seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if baseline:
+        regressions = compare_reports(report, baseline, args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1e6:.1f} us -> {after * 1e6:.1f} us ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# Load generator for the Diffie-Hellman handshake server
+#
+# Usage:
+#   python dh_load_generator.py --serve --handshakes 200 --concurrency 16
+#   python dh_load_generator.py --port 8765 --handshakes 1000 --concurrency 64
+
+import argparse
+import asyncio
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dh_server import DHHandshakeServer, dh_handshake_client, DEFAULT_G, DEFAULT_P
+
+# Helper function: nearest-rank percentile
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+# Function to run the load
+async def generate_load(handshakes, concurrency, host="127.0.0.1", port=8765, path=None, g=DEFAULT_G, p=DEFAULT_P):
+    """
+    Runs handshakes handshakes with at most concurrency in flight and returns
+    {"handshakes", "errors", "seconds", "handshakes_per_second", "p50", "p99", "max"}
+    with latencies in seconds.
+    """
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await dh_handshake_client(g, p, host, port, path, executor)
+            except (ConnectionError, ValueError, OSError, asyncio.IncompleteReadError):
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(handshakes)))
+    finally:
+        executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "handshakes": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "handshakes_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) if latencies else None,
+        "p99": percentile(latencies, 0.99) if latencies else None,
+        "max": max(latencies) if latencies else None,
+    }
+
+async def _run(args):
+    server = None
+    host, port, path = args.host, args.port, args.unix
+    if args.serve:
+        # In-process server on an ephemeral port; its arithmetic still runs in worker processes
+        server = DHHandshakeServer(max_concurrency=args.server_concurrency)
+        await server.start(host, 0, path)
+        if path is None:
+            host, port = server.address[:2]
+    try:
+        return await generate_load(args.handshakes, args.concurrency, host, port, path)
+    finally:
+        if server is not None:
+            await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against the Diffie-Hellman handshake server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--serve", action="store_true", help="start a server in this process instead of connecting to one")
+    parser.add_argument("--server-concurrency", type=int, help="max-concurrency of the --serve server")
+    parser.add_argument("--handshakes", type=int, default=200, help="total handshakes to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="handshakes in flight at once")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(_run(args))
+    print(f"Handshakes:     {result['handshakes']} ({result['errors']} errors) in {result['seconds']:.2f} s")
+    print(f"Throughput:     {result['handshakes_per_second']:.1f} handshakes/sec")
+    if result["handshakes"]:
+        print(f"Latency p50:    {result['p50'] * 1000:.1f} ms")
+        print(f"Latency p99:    {result['p99'] * 1000:.1f} ms")
+        print(f"Latency max:    {result['max'] * 1000:.1f} ms")
+    return 1 if result["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# Asyncio Diffie-Hellman handshake server and client
+#
+# Protocol: every message is a frame of a 4-byte big-endian length followed by
+# an ASCII payload.
+#   client -> server: A          (the client's public key g^a mod p, decimal)
+#   server -> client: OK:B       (the server's public key g^b mod p, decimal)
+#                  or ERR:reason
+# Both sides then hold the shared secret g^(ab) mod p.
+#
+# Usage:
+#   python dh_server.py --port 8765
+#   python dh_server.py --unix /tmp/dh.sock --workers 4 --max-concurrency 8
+
+import argparse
+import asyncio
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from symoblic_arithmetic import get_modulus_context, fixed_base_powmod, subtract_large_numbers, compare_abs
+from random_integer_below import string_random_below
+from parallel import default_workers
+
+FRAME_HEADER = struct.Struct(">I")
+
+# Largest accepted frame; public keys are a few hundred digits
+MAX_FRAME_SIZE = 64 * 1024
+
+# Seconds a client may take to send its public key before the connection is dropped
+READ_TIMEOUT = 10.0
+
+# Group used by the example programs
+DEFAULT_G = "5"
+DEFAULT_P = "15234745201463007706558111083071717085392259682287044574142794675291425649677126470685490446237419785664197470483041493246021879373950819965360084406516123"
+
+# Helper function: write one frame
+async def write_frame(writer, payload):
+    writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+    await writer.drain()  # Respect the transport's flow control
+
+# Helper function: read one frame
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError("Frame too large.")
+    return await reader.readexactly(length)
+
+# Function to check a peer's public key
+def is_valid_public_key(value, p):
+    """Accepts decimal public keys in [2, p-2]."""
+    if not value.isdigit() or value.startswith("0"):
+        return False
+    return compare_abs(value, "2") >= 0 and compare_abs(value, subtract_large_numbers(p, "2")) <= 0
+
+# Function to generate an ephemeral key pair
+def generate_keypair(g, p):
+    """Returns (x, g^x mod p) for a random ephemeral key x in [1, p-1)."""
+    x = string_random_below(subtract_large_numbers(p, "1"))
+    return x, fixed_base_powmod(g, x, p)
+
+# Function to compute the server side of a handshake
+def server_handshake(g, p, client_public):
+    """Returns (server public key, shared secret) for the client's public key. Runs in a worker."""
+    b, B = generate_keypair(g, p)
+    return B, get_modulus_context(p).powmod(client_public, b)
+
+class DHHandshakeServer:
+    """
+    Asyncio handshake server for a fixed group (g, p). The modular arithmetic runs
+    in an executor (a process pool by default) so the event loop only moves frames.
+    At most max_concurrency handshakes are computed at once; connections beyond
+    max_pending waiting handshakes are refused with ERR:busy instead of queueing
+    without bound. Open connections are counted from accept, so peers that connect
+    and stay idle are bounded as well: beyond max_connections a new connection is
+    refused with ERR:busy right away, and a peer that has not sent its public key
+    within read_timeout seconds is dropped. on_shared_secret(secret, peer) is
+    called for every completed handshake.
+    """
+
+    def __init__(self, g=DEFAULT_G, p=DEFAULT_P, executor=None, max_concurrency=None, max_pending=256, max_connections=1024, read_timeout=READ_TIMEOUT, on_shared_secret=None):
+        self.g = g
+        self.p = p
+        self._owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=default_workers())
+        self.max_concurrency = max_concurrency or default_workers()
+        self.max_pending = max_pending
+        self.max_connections = max_connections
+        self.read_timeout = read_timeout
+        self.on_shared_secret = on_shared_secret
+        self.completed = 0
+        self.refused = 0
+        self.failed = 0
+        self._pending = 0
+        self._connections = 0
+        self._semaphore = None
+        self._server = None
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                self.refused += 1
+                await write_frame(writer, b"ERR:busy")
+                return
+
+            client_public = (await asyncio.wait_for(read_frame(reader), self.read_timeout)).decode("ascii")
+            if not is_valid_public_key(client_public, self.p):
+                self.failed += 1
+                await write_frame(writer, b"ERR:invalid public key")
+                return
+            if self._pending >= self.max_pending:
+                self.refused += 1
+                await write_frame(writer, b"ERR:busy")
+                return
+
+            self._pending += 1
+            try:
+                async with self._semaphore:
+                    loop = asyncio.get_running_loop()
+                    server_public, shared = await loop.run_in_executor(self.executor, server_handshake, self.g, self.p, client_public)
+            finally:
+                self._pending -= 1
+
+            await write_frame(writer, b"OK:" + server_public.encode("ascii"))
+            self.completed += 1
+            if self.on_shared_secret is not None:
+                self.on_shared_secret(shared, peer)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError, UnicodeDecodeError):
+            self.failed += 1
+        finally:
+            self._connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Starts listening on TCP (host, port) or, with path, on a Unix socket. Returns the asyncio server."""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server
+
+    @property
+    def address(self):
+        """The bound address: (host, port) for TCP or the socket path."""
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._owns_executor:
+            self.executor.shutdown()
+
+# Function to run the client side of a handshake
+async def dh_handshake_client(g=DEFAULT_G, p=DEFAULT_P, host="127.0.0.1", port=8765, path=None, executor=None):
+    """
+    Performs one handshake with a DHHandshakeServer and returns the shared secret.
+    The client's arithmetic runs in executor (the loop's default executor if None).
+    """
+    loop = asyncio.get_running_loop()
+    a, A = await loop.run_in_executor(executor, generate_keypair, g, p)
+
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await write_frame(writer, A.encode("ascii"))
+        reply = (await read_frame(reader)).decode("ascii")
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    status, _, value = reply.partition(":")
+    if status != "OK":
+        raise ConnectionError(f"Handshake refused: {value}")
+    if not is_valid_public_key(value, p):
+        raise ValueError("Server sent an invalid public key.")
+    return await loop.run_in_executor(executor, get_modulus_context(p).powmod, value, a)
+
+async def _serve(args):
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers else None
+    server = DHHandshakeServer(executor=executor, max_concurrency=args.max_concurrency, max_pending=args.max_pending,
+                               max_connections=args.max_connections, read_timeout=args.read_timeout)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Serving Diffie-Hellman handshakes on {server.address}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diffie-Hellman handshake server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="worker processes for the arithmetic (default: CPU count)")
+    parser.add_argument("--max-concurrency", type=int, help="handshakes computed at once (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=256, help="waiting handshakes before new ones are refused")
+    parser.add_argument("--max-connections", type=int, default=1024, help="open connections before new ones are refused")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT, help="seconds a client may take to send its public key")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
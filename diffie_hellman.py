@@ -1,10 +1,11 @@
 # Diffie-Hellman Key Exchange Protocol Implementation with Symbolic Arithmetic
 
-from symoblic_arithmetic import string_modular_exponentiation
+from symoblic_arithmetic import get_modulus_context, fixed_base_powmod, fixed_base_multi_powmod
 from random_integer_below import choose_two_random_numbers_symbolic
+from instrumentation import arithmetic_profile
 
 # Diffie-Hellman Key Exchange Protocol
-def diffie_hellman_key_exchange_string(g, p, a, b):
+def diffie_hellman_key_exchange_string(g, p, a=None, b=None, pool=None):
     """
     Implements the Diffie-Hellman key exchange protocol with string-based arithmetic.
     
@@ -13,17 +14,32 @@ def diffie_hellman_key_exchange_string(g, p, a, b):
     - p: Large prime number (as a string)
     - a: Alice's ephemeral key (as a string)
     - b: Bob's ephemeral key (as a string)
+    - pool: optional EphemeralKeyPool for (g, p); a missing a or b is drawn
+      from it together with its precomputed public key
     
     Output:
     - The shared private key g^(ab) % p as a string
     """
-    # Step 1: Compute public keys
-    A = string_modular_exponentiation(g, a, p)  # Alice's public key
-    B = string_modular_exponentiation(g, b, p)  # Bob's public key
+    ctx = get_modulus_context(p)  # Reduction constants for p, built once per modulus
+
+    # Step 1: Compute public keys (fixed-base table for g once the group recurs)
+    if a is None or b is None:
+        if pool is None:
+            raise ValueError("Both ephemeral keys are required unless a key pool is given.")
+        pool.check_group(g, p)
+    if b is None:
+        b, B = pool.draw()
+    else:
+        B = fixed_base_powmod(g, b, p)  # Bob's public key
 
     # Step 2: Compute shared secret
-    shared_secret_alice = string_modular_exponentiation(B, a, p)  # Alice computes this
-    shared_secret_bob = string_modular_exponentiation(A, b, p)    # Bob computes this
+    if a is None:
+        a, A = pool.draw()
+        shared_secret_alice = ctx.powmod(B, a)  # Alice computes this
+    else:
+        # Alice's public key g^a and her shared secret B^a share the exponent a
+        A, (shared_secret_alice,) = fixed_base_multi_powmod(g, [B], a, p)
+    shared_secret_bob = ctx.powmod(A, b)    # Bob computes this
     
     assert shared_secret_alice == shared_secret_bob, "The shared secrets do not match!"
     return shared_secret_alice
@@ -35,8 +51,10 @@ def main():
     a, b = choose_two_random_numbers_symbolic(p) # Alice's and Bob's ephemeral keys (as string)
 
     # Perform the key exchange
-    shared_key = diffie_hellman_key_exchange_string(g, p, a, b)
+    with arithmetic_profile() as profile:
+        shared_key = diffie_hellman_key_exchange_string(g, p, a, b)
     print(f"Shared secret key: {shared_key}")
+    print(f"Key exchange breakdown:\n{profile.report()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
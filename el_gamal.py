@@ -1,46 +1,208 @@
 # El Gamal Implementation using Diffie-Hellman shared key
 
-from symoblic_arithmetic import string_modular_exponentiation, string_multiply, string_mod, string_mod_inverse, encode_plaintext, decode_plaintext
-from random_integer_below import choose_two_random_numbers_symbolic
+from symoblic_arithmetic import get_modulus_context, fixed_base_powmod, fixed_base_multi_powmod, subtract_large_numbers, batch_mod_inverse, encode_plaintext_blocks, decode_plaintext_blocks, BLOCK_SEPARATOR
+from random_integer_below import choose_two_random_numbers_symbolic, string_random_below
 from diffie_hellman import diffie_hellman_key_exchange_string
+from parallel import parallel_map
+from lru import LRUCache
+from batch_arithmetic import batch_mulmod, batch_powmod, regroup
+
+# Helper function: fresh ephemeral keys
+def _ephemeral_keys(count, p, g, pool=None):
+    """
+    Returns count unused ephemeral keys as (b, y1) pairs. With pool, an
+    EphemeralKeyPool for (g, p), y1 = g^b comes precomputed; otherwise b is drawn
+    at random from [1, p-1) and y1 is None, left for the caller to compute.
+    """
+    if pool is not None:
+        pool.check_group(g, p)
+        return [pool.draw() for _ in range(count)]
+    p_minus_1 = subtract_large_numbers(p, "1")
+    return [(string_random_below(p_minus_1), None) for _ in range(count)]
+
+# Helper function: encrypt numeric blocks, one ephemeral key per block
+def _encrypt_blocks(plaintext_blocks, p, g, g_a, shared_secret, ephemerals):
+    ctx = get_modulus_context(p)  # Reduction constants for p, built once per modulus
+    y1_blocks, y2_blocks = [], []
+    for plaintext_num, (b, y1) in zip(plaintext_blocks, ephemerals):
+        if y1 is None:
+            # g^b % p and g^(ab) % p share the exponent b; g^b uses the fixed-base table once the group recurs
+            y1, (g_ab,) = fixed_base_multi_powmod(g, [g_a], b, p)
+        else:
+            g_ab = ctx.powmod(g_a, b)  # g^(ab) % p
+        y1_blocks.append(y1)
+
+        # y2 = (plaintext * g^(ab) * shared_secret) % p
+        y2_blocks.append(ctx.mulmod(plaintext_num, ctx.mulmod(g_ab, shared_secret)))
+    return BLOCK_SEPARATOR.join(y1_blocks), BLOCK_SEPARATOR.join(y2_blocks)
+
+# Helper function: inverse masks for a set of y1 values
+def _inverse_masks(y1_values, p, a, shared_secret):
+    """Returns {y1: (y1^a * shared_secret)^-1 mod p}, inverting all masks at once."""
+    ctx = get_modulus_context(p)
+    y1_values = list(dict.fromkeys(y1_values))
+    masks = [ctx.mulmod(ctx.powmod(y1, a), shared_secret) for y1 in y1_values]
+    return dict(zip(y1_values, batch_mod_inverse(masks, p)))
+
+# Helper function: split a ciphertext into per-block (y1, y2) pairs
+def _ciphertext_blocks(ciphertext):
+    y1, y2 = ciphertext
+    y1_blocks, y2_blocks = y1.split(BLOCK_SEPARATOR), y2.split(BLOCK_SEPARATOR)
+    if len(y1_blocks) == 1:
+        y1_blocks *= len(y2_blocks)  # A single y1 applies to every block
+    elif len(y1_blocks) != len(y2_blocks):
+        raise ValueError("Ciphertext has a different number of y1 and y2 blocks.")
+    return y1_blocks, y2_blocks
 
 # ElGamal Encryption using Diffie-Hellman shared key
-def elgamal_encrypt_string_with_shared_key(plaintext, p, g, g_a, b, shared_secret):
-    """Encrypts plaintext using symbolic arithmetic and Diffie-Hellman shared secret."""
-    # Convert plaintext to a numeric representation
-    plaintext_num = encode_plaintext(plaintext)
-
-    # Reduce numerical value mod p
-    plaintext_num = string_mod(plaintext_num, p)
-
-    # Compute ciphertext (y1, y2)
-    y1 = string_modular_exponentiation(g, b, p)  # g^b % p
-    g_ab = string_modular_exponentiation(g_a, b, p)  # g^(ab) % p
-    g_ab_shared = string_mod(string_multiply(g_ab, shared_secret), p)  # Apply shared secret to g^(ab)
-    
-    # y2 = (plaintext * g^(ab) * shared_secret) % p
-    y2 = string_mod(string_multiply(plaintext_num, g_ab_shared), p)
-
-    return y1, y2
+def elgamal_encrypt_string_with_shared_key(plaintext, p, g, g_a, b, shared_secret, pool=None):
+    """
+    Encrypts plaintext using symbolic arithmetic and Diffie-Hellman shared secret.
+    Plaintexts longer than one block below p are split into blocks, and every
+    block gets its own ephemeral key: b for the first block (if given), fresh
+    keys from pool, an EphemeralKeyPool for (g, p), or from secrets for the rest.
+    The y1 and y2 values of the blocks are joined with BLOCK_SEPARATOR.
+    """
+    # Convert plaintext to numeric blocks below p
+    plaintext_blocks = encode_plaintext_blocks(plaintext, p)
+
+    ephemerals = [(b, None)] if b is not None else []
+    ephemerals += _ephemeral_keys(len(plaintext_blocks) - len(ephemerals), p, g, pool)
+    return _encrypt_blocks(plaintext_blocks, p, g, g_a, shared_secret, ephemerals)
 
 # ElGamal Decryption using Diffie-Hellman shared key
 def elgamal_decrypt_string_with_shared_key(ciphertext, p, a, shared_secret):
     """Decrypts ciphertext using symbolic arithmetic and Diffie-Hellman shared secret."""
-    y1, y2 = ciphertext
-
-    # Compute g^(ab) % p
-    g_ab = string_modular_exponentiation(y1, a, p)
-    g_ab_shared = string_mod(string_multiply(g_ab, shared_secret), p)  # Apply shared secret to g^(ab)
-
-    # Compute modular inverse of g^(ab) * shared_secret
-    g_ab_shared_inverse = string_mod_inverse(g_ab_shared, p)
-
-    # Recover plaintext as a number
-    plaintext_num = string_mod(string_multiply(y2, g_ab_shared_inverse), p)
-
-    # Decode numerical value to plaintext
-    plaintext = decode_plaintext(plaintext_num)
-    return plaintext
+    ctx = get_modulus_context(p)  # Reduction constants for p, built once per modulus
+    y1_blocks, y2_blocks = _ciphertext_blocks(ciphertext)
+
+    # Inverse of g^(ab) * shared_secret for every distinct y1
+    inverse_masks = _inverse_masks(y1_blocks, p, a, shared_secret)
+
+    # Recover plaintext blocks as numbers
+    plaintext_blocks = [ctx.mulmod(y2_block, inverse_masks[y1_block]) for y1_block, y2_block in zip(y1_blocks, y2_blocks)]
+
+    # Decode numerical values to plaintext
+    return decode_plaintext_blocks(plaintext_blocks, p)
+
+class ElGamalSession:
+    """
+    El Gamal group parameters, keys and Diffie-Hellman shared secret together
+    with the values derived from them. The modulus context is built once and the
+    inverse mask per y1 is kept in a bounded LRU cache, so ciphertexts sharing y1
+    are decrypted without another exponentiation or inversion. Encryption draws
+    a fresh ephemeral key for every block, so there is nothing to cache there.
+    """
+
+    def __init__(self, p, shared_secret, g=None, g_a=None, a=None, cache_size=1024):
+        self.p = p
+        self.shared_secret = shared_secret
+        self.g = g
+        self.g_a = g_a
+        self.a = a
+        self.inverse_masks = LRUCache(cache_size)  # y1 -> (g^(ab) * shared_secret)^-1
+        self._context = None
+
+    @property
+    def context(self):
+        """ModulusContext for p."""
+        if self._context is None:
+            self._context = get_modulus_context(self.p)
+        return self._context
+
+    def _inverse_mask(self, y1):
+        return _inverse_masks([y1], self.p, self.a, self.shared_secret)[y1]
+
+    def encrypt(self, plaintext, pool=None):
+        """Encrypts like elgamal_encrypt_string_with_shared_key, with fresh ephemeral keys from pool or from secrets."""
+        if self.g is None or self.g_a is None:
+            raise ValueError("Encryption needs g and g^a.")
+        return elgamal_encrypt_string_with_shared_key(plaintext, self.p, self.g, self.g_a, None, self.shared_secret, pool)
+
+    def decrypt(self, ciphertext):
+        """Same result as elgamal_decrypt_string_with_shared_key(ciphertext, p, a, shared_secret)."""
+        if self.a is None:
+            raise ValueError("Decryption needs the private key a.")
+        ctx = self.context
+        plaintext_blocks = []
+        for y1, y2 in zip(*_ciphertext_blocks(ciphertext)):
+            inverse_mask = self.inverse_masks.get_or_compute(y1, lambda y1=y1: self._inverse_mask(y1))
+            plaintext_blocks.append(ctx.mulmod(y2, inverse_mask))
+        return decode_plaintext_blocks(plaintext_blocks, self.p)
+
+# Batch tasks; the key material is bound per call by parallel_map
+def _encrypt_batch_item(keys, item):
+    plaintext_blocks, ephemerals = item
+    return _encrypt_blocks(plaintext_blocks, keys["p"], keys["g"], keys["g_a"], keys["shared_secret"], ephemerals)
+
+def _decrypt_batch_item(keys, ciphertext):
+    return elgamal_decrypt_string_with_shared_key(ciphertext, keys["p"], keys["a"], keys["shared_secret"])
+
+# Helper function: encrypt every block of every plaintext in lockstep
+def _encrypt_vectorized(plaintexts, p, g, g_a, shared_secret, pool=None):
+    groups = [encode_plaintext_blocks(plaintext, p) for plaintext in plaintexts]
+    blocks = [block for group in groups for block in group]
+
+    # A fresh ephemeral key per block: g^b (unless the pool has it) and g^(ab) for every block in one batch
+    ephemerals = _ephemeral_keys(len(blocks), p, g, pool)
+    missing = [b for b, y1 in ephemerals if y1 is None]
+    exps = [b for b, _ in ephemerals]
+    powers = batch_powmod([g] * len(missing) + [g_a] * len(exps), missing + exps, p)
+    computed = iter(powers[:len(missing)])
+    y1_blocks = [next(computed) if y1 is None else y1 for _, y1 in ephemerals]
+
+    masks = batch_mulmod(powers[len(missing):], shared_secret, p)
+    y2_blocks = batch_mulmod(blocks, masks, p)
+    return [(BLOCK_SEPARATOR.join(y1_group), BLOCK_SEPARATOR.join(y2_group)) for y1_group, y2_group in zip(regroup(y1_blocks, groups), regroup(y2_blocks, groups))]
+
+# Helper function: decrypt every block of every ciphertext in lockstep
+def _decrypt_vectorized(ciphertexts, p, a, shared_secret):
+    # One exponentiation and inversion per distinct y1, all in one batch
+    groups = [_ciphertext_blocks(ciphertext) for ciphertext in ciphertexts]
+    y1_blocks = [y1 for y1_group, _ in groups for y1 in y1_group]
+    y1_values = list(dict.fromkeys(y1_blocks))
+    masks = batch_mulmod(batch_powmod(y1_values, a, p), shared_secret, p)
+    inverse_masks = dict(zip(y1_values, batch_mod_inverse(masks, p)))
+
+    blocks = [y2 for _, y2_group in groups for y2 in y2_group]
+    plaintext_blocks = batch_mulmod(blocks, [inverse_masks[y1] for y1 in y1_blocks], p)
+    return [decode_plaintext_blocks(group, p) for group in regroup(plaintext_blocks, [y2_group for _, y2_group in groups])]
+
+def elgamal_encrypt_batch(plaintexts, p, g, g_a, shared_secret, pool=None, workers=None, chunksize=None, backend="process"):
+    """
+    Encrypts an iterable of plaintexts and returns the ciphertexts in input order.
+    Every block of every message gets its own ephemeral key, drawn from pool (an
+    EphemeralKeyPool for (g, p)) or from secrets.
+    backend="process" spreads them across a process pool (workers defaults to the
+    CPU count; workers=1 runs serially); backend="numpy" masks all blocks in
+    lockstep with the vectorized batch arithmetic.
+    """
+    if backend == "numpy":
+        return _encrypt_vectorized(list(plaintexts), p, g, g_a, shared_secret, pool)
+    if backend != "process":
+        raise ValueError(f"Unknown batch backend: {backend}")
+
+    # Ephemeral keys are drawn here, so pool keys are never shipped to two workers
+    items = []
+    for plaintext in plaintexts:
+        plaintext_blocks = encode_plaintext_blocks(plaintext, p)
+        items.append((plaintext_blocks, _ephemeral_keys(len(plaintext_blocks), p, g, pool)))
+    keys = {"p": p, "g": g, "g_a": g_a, "shared_secret": shared_secret}
+    return parallel_map(_encrypt_batch_item, items, (keys,), workers, chunksize)
+
+def elgamal_decrypt_batch(ciphertexts, p, a, shared_secret, workers=None, chunksize=None, backend="process"):
+    """
+    Decrypts an iterable of ciphertexts and returns the plaintexts in input order.
+    backend="process" spreads them across a process pool (workers defaults to the
+    CPU count; workers=1 runs serially); backend="numpy" decrypts all blocks in
+    lockstep with the vectorized batch arithmetic.
+    """
+    if backend == "numpy":
+        return _decrypt_vectorized(list(ciphertexts), p, a, shared_secret)
+    if backend != "process":
+        raise ValueError(f"Unknown batch backend: {backend}")
+    keys = {"p": p, "a": a, "shared_secret": shared_secret}
+    return parallel_map(_decrypt_batch_item, ciphertexts, (keys,), workers, chunksize)
 
 # Full communication example using Diffie-Hellman and ElGamal
 def main():
@@ -54,7 +216,7 @@ def main():
     print(f"Shared secret key: {shared_key}")
 
     # Compute g^a mod p (Alice's public key)
-    g_a = string_modular_exponentiation(g, a, p)
+    g_a = fixed_base_powmod(g, a, p)
 
     # Input plaintext
     plaintext = "HELLOOOO"
@@ -0,0 +1,249 @@
+# Hybrid encryption: a public-key handshake once per session, a keystream for the bulk data
+#
+# The session secret comes from a random session key wrapped with RSA, or from
+# a Diffie-Hellman exchange. It seeds a keystream that is XORed with the
+# payload, so the public-key cost no longer grows with the message size.
+# The stream is not authenticated: a modified ciphertext decrypts to modified data.
+#
+# Security basis:
+# - RSA mode uses a modular-squaring generator (x -> x^2 mod n) under the RSA
+#   modulus, as Blum-Blum-Shub does. Stepping the state backwards means taking
+#   square roots modulo n, which is as hard as factoring n. This is heuristic:
+#   BBS is only proven secure when each step emits O(log log n) bits, and this
+#   generator emits about 15% of the state per squaring (the low 9 bits of the
+#   low half of the limbs).
+# - Diffie-Hellman mode does not square: modulo the public prime p anyone can
+#   take square roots, so a squaring state would hide nothing. Instead the
+#   shared secret is condensed into a key with HMAC-SHA256 (the HKDF extract
+#   step, salted with the nonce), and the keystream is HMAC-SHA256 of a block
+#   counter under that key. The key is unpredictable as long as the
+#   Diffie-Hellman secret is, and HMAC-SHA256 with an unknown key is a
+#   pseudorandom function, so its outputs on distinct counters cannot be told
+#   from random bytes. No output reveals anything that could be stepped
+#   forward, and a fresh nonce gives a fresh key for every message.
+
+import hashlib
+import hmac
+import io
+import secrets
+import struct
+from symoblic_arithmetic import get_modulus_context, encode_bytes, string_add, LIMB_DIGITS
+from random_integer_below import string_random_below
+from rsa import rsa_crt_exponentiation
+from stream_encryption import read_blocks, prefetch, write_behind
+
+# Stream layout:
+#   header: MAGIC, one mode byte (b"H" for a Diffie-Hellman secret, b"R" for an
+#           RSA-wrapped session key), NONCE_BYTES random bytes, and in RSA mode
+#           the wrapped key as a 4-byte length and ASCII digits (big-endian lengths)
+#   frames: 4-byte ciphertext length, ciphertext; a zero-length frame ends the stream
+# Diffie-Hellman streams used to be marked b"D" and keyed by squaring modulo p;
+# those are rejected as an unknown mode rather than decrypted to garbage.
+MAGIC = b"SYMH\x01"
+DH_MODE = b"H"
+RSA_MODE = b"R"
+NONCE_BYTES = 16
+FRAME_HEADER = struct.Struct(">I")
+
+# Plaintext bytes per frame, and the largest frame a decryptor accepts
+CHUNK_SIZE = 64 * 1024
+
+# Keystream bits taken from every emitted limb of the generator state. 10^9 is
+# a multiple of 2^9, so a uniform base 10^9 limb has exactly uniform low 9 bits;
+# any higher bit is biased.
+KEYSTREAM_LIMB_BITS = 9
+KEYSTREAM_LIMB_MASK = (1 << KEYSTREAM_LIMB_BITS) - 1
+
+class Keystream:
+    """
+    Modular-squaring keystream under an RSA modulus n. The state starts from the
+    session secret and the nonce, and is squared twice to mix them. Every later
+    squaring emits the low 9 bits of each limb in the low half of the state.
+    The security of this construction is heuristic (see the module notes); it
+    needs a modulus whose factorization is secret, so it is used in RSA mode only.
+    The same (secret, modulus, nonce) always gives the same stream, so every
+    message needs a fresh nonce.
+    """
+
+    def __init__(self, secret, modulus, nonce):
+        self.context = get_modulus_context(modulus)
+        limb_count = -(-len(self.context.modulus) // LIMB_DIGITS)
+        if limb_count < 2:
+            raise ValueError("Modulus is too small for the keystream.")
+        self._low_digits = limb_count // 2 * LIMB_DIGITS  # Decimal digits of the emitted low half
+
+        # Seed: secret and nonce digits side by side, reduced modulo n
+        seed = self.context.reduce(secret + encode_bytes(nonce).zfill(40))
+        self._state = self.context.sqrmod(self.context.sqrmod(seed))
+        if self._state in ("0", "1"):
+            raise ValueError("Degenerate keystream seed.")
+        self._buffer = b""
+        self._bits = 0  # Emitted bits not yet making up a whole byte
+        self._bit_count = 0
+
+    def _next_block(self):
+        self._state = self.context.sqrmod(self._state)
+        low = self._state[-self._low_digits:].zfill(self._low_digits)
+
+        # Limbs of the low half, least significant first
+        bits, count = self._bits, self._bit_count
+        for end in range(self._low_digits, 0, -LIMB_DIGITS):
+            bits |= (int(low[end - LIMB_DIGITS:end]) & KEYSTREAM_LIMB_MASK) << count
+            count += KEYSTREAM_LIMB_BITS
+        size = count // 8
+        self._bits, self._bit_count = bits >> (8 * size), count - 8 * size
+        return (bits & ((1 << (8 * size)) - 1)).to_bytes(size, "little")
+
+    def read(self, size):
+        """Returns the next size keystream bytes."""
+        blocks = [self._buffer]
+        available = len(self._buffer)
+        while available < size:
+            block = self._next_block()
+            blocks.append(block)
+            available += len(block)
+        data = b"".join(blocks)
+        self._buffer = data[size:]
+        return data[:size]
+
+    def xor(self, data):
+        """XORs data with the next len(data) keystream bytes."""
+        if not data:
+            return b""
+        stream = self.read(len(data))
+        return (int.from_bytes(data, "little") ^ int.from_bytes(stream, "little")).to_bytes(len(data), "little")
+
+class HmacKeystream(Keystream):
+    """
+    Keystream for a Diffie-Hellman shared secret: HMAC-SHA256 in counter mode.
+    The key is HMAC-SHA256(nonce, secret), and block i of the stream is
+    HMAC-SHA256(key, p || i) for the group prime p. See the module notes for
+    why this holds where squaring modulo p would not. Same read/xor interface
+    as Keystream, and the same need for a fresh nonce per message.
+    """
+
+    def __init__(self, secret, modulus, nonce):
+        if secret in ("0", "1"):
+            raise ValueError("Degenerate Diffie-Hellman secret.")
+        key = hmac.new(nonce, secret.encode("ascii"), hashlib.sha256).digest()
+        self._mac = hmac.new(key, modulus.encode("ascii") + b":", hashlib.sha256)
+        self._counter = 0
+        self._buffer = b""
+
+    def _next_block(self):
+        mac = self._mac.copy()
+        mac.update(self._counter.to_bytes(8, "big"))
+        self._counter += 1
+        return mac.digest()
+
+# Function to create an RSA-wrapped session key
+def wrap_session_key(public_key):
+    """Returns (session key, session key^e mod n): a random session secret and its RSA encryption."""
+    n_str, e_str = public_key
+    session_key = string_add(string_random_below(n_str), "1")
+    while session_key == n_str:
+        session_key = string_add(string_random_below(n_str), "1")
+    return session_key, get_modulus_context(n_str).powmod(session_key, e_str, cache=True)
+
+# Function to recover an RSA-wrapped session key
+def unwrap_session_key(wrapped_key, private_key):
+    """Decrypts a wrapped session key with an RSAPrivateKey (through the CRT) or a legacy (n, d) tuple."""
+    if len(private_key) == 2:
+        return get_modulus_context(private_key[0]).powmod(wrapped_key, private_key[1], cache=True)
+    return rsa_crt_exponentiation(wrapped_key, private_key)
+
+# Hybrid streaming encryption
+def hybrid_encrypt_stream(source, secret, modulus, wrapped_key=None, chunk_size=CHUNK_SIZE):
+    """
+    Encrypts a binary file object with the keystream of (secret, modulus) and a
+    fresh nonce. With wrapped_key (from wrap_session_key) the stream is in RSA
+    mode and carries the wrapped key; otherwise secret is a Diffie-Hellman shared
+    secret and modulus the group prime. chunk_size may not exceed CHUNK_SIZE.
+    Yields the encrypted stream as byte chunks.
+    """
+    if not 0 < chunk_size <= CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between 1 and {CHUNK_SIZE}.")
+    nonce = secrets.token_bytes(NONCE_BYTES)
+
+    if wrapped_key is None:
+        keystream = HmacKeystream(secret, modulus, nonce)
+        yield MAGIC + DH_MODE + nonce
+    else:
+        keystream = Keystream(secret, modulus, nonce)
+        digits = wrapped_key.encode("ascii")
+        yield MAGIC + RSA_MODE + nonce + FRAME_HEADER.pack(len(digits)) + digits
+    for chunk in prefetch(read_blocks(source, chunk_size)):
+        yield FRAME_HEADER.pack(len(chunk)) + keystream.xor(chunk)
+    yield FRAME_HEADER.pack(0)
+
+# Helper function: read exactly size bytes
+def _read_exactly(source, size):
+    data = source.read(size)
+    if len(data) < size:
+        raise ValueError("Truncated hybrid stream.")
+    return data
+
+# Hybrid streaming decryption
+def hybrid_decrypt_stream(source, secret=None, modulus=None, private_key=None):
+    """
+    Decrypts a stream produced by hybrid_encrypt_stream. An RSA-mode stream needs
+    private_key; a Diffie-Hellman-mode stream needs secret and modulus.
+    Yields the plaintext as byte chunks.
+    """
+    header = _read_exactly(source, len(MAGIC) + 1 + NONCE_BYTES)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a hybrid stream.")
+    mode, nonce = header[len(MAGIC):len(MAGIC) + 1], header[len(MAGIC) + 1:]
+
+    if mode == RSA_MODE:
+        if private_key is None:
+            raise ValueError("An RSA-mode stream needs the private key.")
+        modulus = private_key[0]
+        (length,) = FRAME_HEADER.unpack(_read_exactly(source, FRAME_HEADER.size))
+        if length > len(modulus):
+            raise ValueError("Wrapped session key is longer than the modulus.")
+        secret = unwrap_session_key(_read_exactly(source, length).decode("ascii"), private_key)
+        keystream = Keystream(secret, modulus, nonce)
+    elif mode == DH_MODE:
+        if secret is None or modulus is None:
+            raise ValueError("A Diffie-Hellman-mode stream needs the shared secret and modulus.")
+        keystream = HmacKeystream(secret, modulus, nonce)
+    else:
+        raise ValueError("Unknown hybrid stream mode.")
+
+    while True:
+        (length,) = FRAME_HEADER.unpack(_read_exactly(source, FRAME_HEADER.size))
+        if length == 0:
+            return
+        if length > CHUNK_SIZE:
+            raise ValueError("Hybrid frame is larger than CHUNK_SIZE.")
+        yield keystream.xor(_read_exactly(source, length))
+
+# Function to encrypt a file in hybrid mode
+def hybrid_encrypt_file(source, destination, secret, modulus, wrapped_key=None, chunk_size=CHUNK_SIZE):
+    """Encrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(hybrid_encrypt_stream(source, secret, modulus, wrapped_key, chunk_size), destination)
+
+# Function to decrypt a file in hybrid mode
+def hybrid_decrypt_file(source, destination, secret=None, modulus=None, private_key=None):
+    """Decrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(hybrid_decrypt_stream(source, secret, modulus, private_key), destination)
+
+# Function to encrypt bytes with a Diffie-Hellman shared secret
+def dh_hybrid_encrypt(data, shared_secret, p):
+    """Encrypts bytes with the keystream of a Diffie-Hellman shared secret modulo p."""
+    return b"".join(hybrid_encrypt_stream(io.BytesIO(data), shared_secret, p))
+
+# Function to decrypt bytes with a Diffie-Hellman shared secret
+def dh_hybrid_decrypt(ciphertext, shared_secret, p):
+    return b"".join(hybrid_decrypt_stream(io.BytesIO(ciphertext), shared_secret, p))
+
+# Function to encrypt bytes under an RSA public key
+def rsa_hybrid_encrypt(data, public_key):
+    """Encrypts bytes with a fresh session key, sent RSA-wrapped in the header."""
+    session_key, wrapped_key = wrap_session_key(public_key)
+    return b"".join(hybrid_encrypt_stream(io.BytesIO(data), session_key, public_key[0], wrapped_key))
+
+# Function to decrypt bytes with an RSA private key
+def rsa_hybrid_decrypt(ciphertext, private_key):
+    return b"".join(hybrid_decrypt_stream(io.BytesIO(ciphertext), private_key=private_key))
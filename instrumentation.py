@@ -0,0 +1,92 @@
+# Opt-in instrumentation for the symbolic arithmetic primitives
+#
+# Usage:
+#   with arithmetic_profile() as prof:
+#       rsa_decrypt(ciphertext, private_key, shared_key)
+#   print(prof.report())
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Profiles collecting data in the current thread or task; instrumented functions only do work when this is non-empty
+_active_profiles = ContextVar("active_profiles", default=())
+_lock = threading.Lock()
+
+class ArithmeticProfile:
+    """
+    Call counts, digits processed and cumulative time per primitive, collected
+    while the profile is active. Times are inclusive: a primitive that calls
+    another instrumented primitive is charged for both.
+    """
+
+    def __init__(self):
+        self._stats = {}
+
+    def record(self, name, digits, seconds):
+        with _lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0, 0.0]
+            stats[0] += 1
+            stats[1] += digits
+            stats[2] += seconds
+
+    def snapshot(self):
+        """Returns {primitive: {"calls": ..., "digits": ..., "seconds": ...}} as collected so far."""
+        with _lock:
+            return {name: {"calls": calls, "digits": digits, "seconds": seconds} for name, (calls, digits, seconds) in self._stats.items()}
+
+    def reset(self):
+        with _lock:
+            self._stats.clear()
+
+    def report(self):
+        """Returns the snapshot as a text table, most expensive primitive first."""
+        rows = sorted(self.snapshot().items(), key=lambda item: item[1]["seconds"], reverse=True)
+        lines = [f"{'primitive':32s} {'calls':>10s} {'digits':>14s} {'seconds':>10s}"]
+        for name, stats in rows:
+            lines.append(f"{name:32s} {stats['calls']:10d} {stats['digits']:14d} {stats['seconds']:10.4f}")
+        return "\n".join(lines)
+
+@contextmanager
+def arithmetic_profile():
+    """
+    Collects an ArithmeticProfile for every instrumented call made inside the
+    block by the current thread or asyncio task. Profiles may be nested.
+    """
+    profile = ArithmeticProfile()
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+# Helper function: digits in decimal string arguments
+def string_digits(args):
+    return sum(len(arg) for arg in args if isinstance(arg, str))
+
+def instrumented(name, size=string_digits):
+    """
+    Decorator recording calls of a primitive under name. size(args) gives the
+    number of digits processed by a call. When no profile is active the only
+    cost is one extra call and an emptiness check.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiles = _active_profiles.get()
+            if not profiles:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                digits = size(args)
+                for profile in profiles:
+                    profile.record(name, digits, elapsed)
+        return wrapper
+    return decorator
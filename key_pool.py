@@ -0,0 +1,141 @@
+# Pool of pre-generated ephemeral keys for Diffie-Hellman and El Gamal
+
+import threading
+import time
+from collections import deque
+from symoblic_arithmetic import subtract_large_numbers, get_fixed_base
+from random_integer_below import string_random_below
+
+class EphemeralKeyPool:
+    """
+    Keeps pre-generated (b, g^b mod p) pairs for a fixed group so handshakes and
+    El Gamal encryptions do not pay for g^b on the request path.
+
+    A background thread tops the pool up to high_water whenever it drops below
+    low_water. draw() takes one pair: in blocking mode it waits for the refiller
+    when the pool is empty, in non-blocking mode it computes the pair on the
+    calling thread instead. Every pair is handed out at most once.
+    The refiller shares the interpreter with the caller, so it is most effective
+    when it can work between requests.
+    """
+
+    def __init__(self, g, p, high_water=32, low_water=None, start=True):
+        if high_water < 1:
+            raise ValueError("high_water must be at least 1.")
+        self.g = g
+        self.p = p
+        self.high_water = high_water
+        self.low_water = high_water // 2 if low_water is None else low_water
+        self._p_minus_1 = subtract_large_numbers(p, "1")  # Keys are drawn from [1, p-1)
+        self._pairs = deque()
+        self._condition = threading.Condition()
+        self._refilling = False
+        self._stopped = False
+        self._thread = None
+        self._metrics = {
+            "generated": 0,  # Pairs produced by the background thread
+            "drawn": 0,  # Pairs handed out from the pool
+            "inline": 0,  # Pairs computed on the calling thread because the pool was empty
+            "waits": 0,  # Blocking draws that found the pool empty
+            "refills": 0,  # Times the pool dropped below low_water and refilling started
+            "generation_seconds": 0.0,  # Time spent generating pairs in the background
+        }
+        if start:
+            self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def check_group(self, g, p):
+        """Raises ValueError if the pool was built for a different (g, p)."""
+        if g != self.g or p != self.p:
+            raise ValueError("Key pool belongs to a different group.")
+
+    def _generate(self):
+        b = string_random_below(self._p_minus_1)
+        # The pool exists to serve this group, so use its fixed-base table from the first key
+        return b, get_fixed_base(self.g, self.p).powmod(b)
+
+    def _run(self):
+        # Build the fixed-base table for g before the first refill
+        get_fixed_base(self.g, self.p)
+        while True:
+            with self._condition:
+                while not self._stopped and not self._refilling:
+                    if len(self._pairs) < self.low_water or not self._pairs:
+                        self._refilling = True
+                        self._metrics["refills"] += 1
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+
+            start = time.perf_counter()
+            pair = self._generate()
+            elapsed = time.perf_counter() - start
+
+            with self._condition:
+                self._pairs.append(pair)
+                self._metrics["generated"] += 1
+                self._metrics["generation_seconds"] += elapsed
+                if len(self._pairs) >= self.high_water:
+                    self._refilling = False
+                self._condition.notify_all()
+
+    def start(self):
+        """Starts the background refill thread."""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="ephemeral-key-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background refill thread; pairs already in the pool can still be drawn."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def draw(self, block=True, timeout=None):
+        """
+        Returns an unused (b, g^b mod p) pair.
+        block=True waits for the refill thread if the pool is empty (raising
+        TimeoutError after timeout seconds); block=False computes the pair on the
+        calling thread instead of waiting.
+        """
+        with self._condition:
+            if not self._pairs:
+                if block and self._thread is not None:
+                    self._metrics["waits"] += 1
+                    if not self._condition.wait_for(lambda: self._pairs or self._stopped, timeout):
+                        raise TimeoutError("No ephemeral key became available in time.")
+                if not self._pairs:
+                    self._metrics["inline"] += 1
+                    pair = None
+            if self._pairs:
+                pair = self._pairs.popleft()
+                self._metrics["drawn"] += 1
+                # Wake the refill thread if the pool dropped below low_water
+                self._condition.notify_all()
+
+        if pair is None:
+            pair = self._generate()
+        return pair
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pairs)
+
+    def metrics(self):
+        """Returns a snapshot of the refill and draw counters and the current pool size."""
+        with self._condition:
+            snapshot = dict(self._metrics)
+            snapshot["size"] = len(self._pairs)
+        return snapshot
@@ -0,0 +1,246 @@
+# Memory-mapped store for precomputed key material and exponentiation tables
+#
+# Usage:
+#   save_keystore("keys.bin", {"rsa": private_key, "dh": get_fixed_base(g, p)})
+#   with KeyStore("keys.bin") as store:
+#       store.install()  # Reuse the stored contexts and tables in this process
+#       private_key = store["rsa"]
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from symoblic_arithmetic import ModulusContext, FixedBaseExponentiation, register_modulus_context, register_fixed_base, get_fixed_base, string_to_limbs, limbs_to_string
+from rsa import RSAPrivateKey, generate_rsa_keys
+
+# File layout (all integers little-endian):
+#   header: MAGIC, version (u16), entry count (u32), index offset (u64),
+#           index length (u64), index crc32 (u32)
+#   entry payloads, back to back
+#   index: per entry name length (u16), UTF-8 name, kind (u8),
+#          payload offset (u64), payload length (u64), payload crc32 (u32)
+# A payload is a sequence of limb vectors: limb count (u32) followed by that
+# many base 10^9 limbs (u32 each), least significant first.
+MAGIC = b"SYMK"
+VERSION = 1
+HEADER = struct.Struct("<4sHIQQI")
+INDEX_ENTRY = struct.Struct("<BQQI")
+
+# Entry kinds
+NUMBERS = 1  # Tuple of decimal strings, e.g. an RSA public key or a Diffie-Hellman group
+RSA_PRIVATE_KEY = 2  # RSAPrivateKey with its CRT parameters
+MODULUS_CONTEXT = 3  # Modulus and Barrett constant
+FIXED_BASE = 4  # g, p, window, max_bits and the table rows
+
+# Helper function: serialize limb vectors
+def _pack_vectors(vectors):
+    parts = []
+    for limbs in vectors:
+        parts.append(struct.pack(f"<I{len(limbs)}I", len(limbs), *limbs))
+    return b"".join(parts)
+
+# Helper function: deserialize limb vectors
+def _unpack_vectors(data):
+    vectors = []
+    offset = 0
+    while offset < len(data):
+        (count,) = struct.unpack_from("<I", data, offset)
+        vectors.append(list(struct.unpack_from(f"<{count}I", data, offset + 4)))
+        offset += 4 + 4 * count
+    return vectors
+
+# Helper function: encode one entry
+def _encode_entry(value):
+    """Returns (kind, payload) for a storable value."""
+    if isinstance(value, RSAPrivateKey):
+        return RSA_PRIVATE_KEY, _pack_vectors([string_to_limbs(field) for field in value])
+    if isinstance(value, ModulusContext):
+        modulus, mu = value.to_precomputed()
+        return MODULUS_CONTEXT, _pack_vectors([string_to_limbs(modulus), mu])
+    if isinstance(value, FixedBaseExponentiation):
+        g, p, window, max_bits, table = value.to_precomputed()
+        header = [string_to_limbs(g), string_to_limbs(p), [window], [max_bits]]
+        return FIXED_BASE, _pack_vectors(header + [entry for row in table for entry in row])
+    if isinstance(value, (tuple, list)) and all(isinstance(field, str) and field.isdigit() for field in value):
+        return NUMBERS, _pack_vectors([string_to_limbs(field) for field in value])
+    raise ValueError(f"Cannot store a value of type {type(value).__name__}.")
+
+# Helper function: decode one entry
+def _decode_entry(kind, data):
+    vectors = _unpack_vectors(data)
+    if kind == NUMBERS:
+        return tuple(limbs_to_string(limbs) for limbs in vectors)
+    if kind == RSA_PRIVATE_KEY:
+        return RSAPrivateKey(*[limbs_to_string(limbs) for limbs in vectors])
+    if kind == MODULUS_CONTEXT:
+        return ModulusContext.from_precomputed(limbs_to_string(vectors[0]), vectors[1])
+    if kind == FIXED_BASE:
+        g, p = limbs_to_string(vectors[0]), limbs_to_string(vectors[1])
+        window, max_bits = vectors[2][0], vectors[3][0]
+        entries = vectors[4:]
+        row_length = (1 << window) - 1
+        table = [entries[i:i + row_length] for i in range(0, len(entries), row_length)]
+        return FixedBaseExponentiation.from_precomputed(g, p, window, max_bits, table)
+    raise ValueError(f"Unknown keystore entry kind {kind}.")
+
+# Function to write a keystore
+def save_keystore(path, entries):
+    """
+    Writes {name: value} to a keystore file. Values may be RSAPrivateKey records,
+    ModulusContext and FixedBaseExponentiation objects, or tuples of decimal
+    strings. The file is written next to path and renamed over it, so readers
+    never see a partial store; it is only readable by its owner, since it may
+    hold private keys.
+    """
+    index = []
+    payloads = []
+    offset = HEADER.size
+    for name, value in entries.items():
+        kind, payload = _encode_entry(value)
+        encoded_name = name.encode("utf-8")
+        index.append(struct.pack("<H", len(encoded_name)) + encoded_name + INDEX_ENTRY.pack(kind, offset, len(payload), zlib.crc32(payload)))
+        payloads.append(payload)
+        offset += len(payload)
+
+    index_bytes = b"".join(index)
+
+    # mkstemp creates the file exclusively, readable by the owner only, under a unique name
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(index), offset, len(index_bytes), zlib.crc32(index_bytes)))
+            for payload in payloads:
+                f.write(payload)
+            f.write(index_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+class KeyStore:
+    """
+    Read-only view of a keystore file. The file is memory-mapped and only the
+    header and index are parsed on open; an entry is checked against its crc32
+    and decoded the first time it is accessed, then kept.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a keystore (empty file).")
+        self._decoded = {}
+        self._index = {}
+        try:
+            self._read_index()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _read_index(self):
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path} is not a keystore (file too short).")
+        magic, version, count, index_offset, index_length, index_crc = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a keystore (bad magic).")
+        if version != VERSION:
+            raise ValueError(f"Unsupported keystore version {version}.")
+        index = self._map[index_offset:index_offset + index_length]
+        if len(index) != index_length or zlib.crc32(index) != index_crc:
+            raise ValueError(f"{self.path} has a corrupt index.")
+
+        offset = 0
+        for _ in range(count):
+            (name_length,) = struct.unpack_from("<H", index, offset)
+            name = index[offset + 2:offset + 2 + name_length].decode("utf-8")
+            offset += 2 + name_length
+            self._index[name] = INDEX_ENTRY.unpack_from(index, offset)
+            offset += INDEX_ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def names(self):
+        return list(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def _payload(self, name):
+        kind, offset, length, crc = self._index[name]
+        payload = self._map[offset:offset + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise ValueError(f"Keystore entry {name!r} is corrupt.")
+        return kind, payload
+
+    def __getitem__(self, name):
+        value = self._decoded.get(name)
+        if value is None:
+            value = self._decoded[name] = _decode_entry(*self._payload(name))
+        return value
+
+    def get(self, name, default=None):
+        return self[name] if name in self._index else default
+
+    def verify(self):
+        """Checks the crc32 of every entry without decoding it; raises ValueError on the first corrupt one."""
+        for name in self._index:
+            self._payload(name)
+
+    def install(self):
+        """Registers every stored modulus context and fixed-base table for reuse by the arithmetic module."""
+        for name, (kind, _, _, _) in self._index.items():
+            if kind == MODULUS_CONTEXT:
+                register_modulus_context(self[name])
+            elif kind == FIXED_BASE:
+                register_fixed_base(self[name])
+
+# Example: precompute once, warm-start afterwards
+def main(path="keystore.bin"):
+    g = "5"
+    p = "15234745201463007706558111083071717085392259682287044574142794675291425649677126470685490446237419785664197470483041493246021879373950819965360084406516123"
+    q = "8386506700653187088114129336508517833941752817092037266701121132685842239715196576751226666314102366205376660890913822464516288805181874490066037489054359"
+
+    start = time.perf_counter()
+    public_key, private_key = generate_rsa_keys(p, q, "17")
+    fixed_base = get_fixed_base(g, p)
+    entries = {
+        "rsa/public": public_key,
+        "rsa/private": private_key,
+        "dh/group": (g, p),
+        "dh/fixed_base": fixed_base,
+        "rsa/n_context": ModulusContext(private_key.n),
+    }
+    cold = time.perf_counter() - start
+    save_keystore(path, entries)
+
+    start = time.perf_counter()
+    with KeyStore(path) as store:
+        store.install()
+        loaded_key = store["rsa/private"]
+    warm = time.perf_counter() - start
+
+    assert loaded_key == private_key
+    print(f"Cold setup: {cold * 1000:.1f} ms, warm start from {path}: {warm * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,49 @@
+# Process-pool helpers for the batch APIs
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Batches shorter than this run serially: starting the pool would cost more than it saves
+SERIAL_THRESHOLD = 4
+
+# Function to pick the default number of workers
+def default_workers():
+    """Returns the number of worker processes used when none is given."""
+    return os.cpu_count() or 1
+
+# Task installed once per pool worker process; pools are private to one parallel_map call
+_worker_task = {}
+
+def _install_worker_task(function, shared):
+    _worker_task["function"] = partial(function, *shared)
+
+def _run_worker_task(item):
+    return _worker_task["function"](item)
+
+# Function to map over items in worker processes
+def parallel_map(function, items, shared=(), workers=None, chunksize=None):
+    """
+    Calls function(*shared, item) for every item and returns the results in input
+    order. Items are spread over a ProcessPoolExecutor in chunks; shared, such as
+    key material, is sent to each worker once by the pool initializer instead of
+    with every task.
+    With workers=1, or fewer than SERIAL_THRESHOLD items, everything runs serially
+    in the calling process, with shared bound to the call rather than stored in
+    any module state, so concurrent callers cannot see each other's keys.
+    """
+    items = list(items)
+    if workers is None:
+        workers = default_workers()
+
+    if workers <= 1 or len(items) < SERIAL_THRESHOLD:
+        task = partial(function, *shared)
+        return [task(item) for item in items]
+
+    workers = min(workers, len(items))
+    if chunksize is None:
+        # A few chunks per worker balances load without paying per-item IPC
+        chunksize = max(1, len(items) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_install_worker_task, initargs=(function, shared)) as executor:
+        return list(executor.map(_run_worker_task, items, chunksize=chunksize))
@@ -0,0 +1,226 @@
+# Prime generation with symbolic arithmetic
+
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from symoblic_arithmetic import ModulusContext, string_add, subtract_large_numbers, string_divide_by_2, is_odd, compare_abs, bit_length, small_residues
+from random_integer_below import string_random_below
+from parallel import default_workers
+
+# Helper function: sieve of Eratosthenes
+def _small_primes(limit):
+    is_prime = bytearray([1]) * limit
+    is_prime[0:2] = b"\x00\x00"
+    for i in range(2, int(limit ** 0.5) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytearray(len(range(i * i, limit, i)))
+    return [i for i in range(limit) if is_prime[i]]
+
+# Odd primes used to reject candidates before any Miller-Rabin round.
+# Sieving by the primes below 2^16 leaves about 10% of odd candidates.
+SMALL_PRIMES = _small_primes(1 << 16)[1:]
+
+# Candidates tried from one random starting point before a search gives up and restarts
+SEARCH_WINDOW = 4096
+
+# Function to pick the number of Miller-Rabin rounds
+def miller_rabin_rounds(bits):
+    """
+    Rounds giving an error probability below 2^-100 for random candidates of the
+    given size (FIPS 186-4, appendix C.3).
+    """
+    if bits >= 1536:
+        return 4
+    if bits >= 1024:
+        return 5
+    if bits >= 512:
+        return 8
+    if bits >= 256:
+        return 16
+    return 40
+
+# Function to run the Miller-Rabin test
+def miller_rabin(n, rounds):
+    """Returns False if n is composite, True if n passed rounds Miller-Rabin rounds with random bases."""
+    if n in ("2", "3"):
+        return True
+    if len(n) == 1 and n in "0149" or not is_odd(n):
+        return False
+
+    # n - 1 = d * 2^s with d odd
+    n_minus_1 = subtract_large_numbers(n, "1")
+    d, s = n_minus_1, 0
+    while not is_odd(d):
+        d = string_divide_by_2(d)
+        s += 1
+
+    ctx = ModulusContext(n)
+    n_minus_3 = subtract_large_numbers(n, "3")
+    for _ in range(rounds):
+        # Base in [2, n-2]
+        a = string_add(string_random_below(n_minus_3), "1") if n_minus_3 != "1" else "2"
+        x = ctx.powmod(a, d)
+        if x == "1" or x == n_minus_1:
+            continue
+        for _ in range(s - 1):
+            x = ctx.sqrmod(x)
+            if x == n_minus_1:
+                break
+        else:
+            return False
+    return True
+
+# Function to test primality
+def is_probable_prime(n, rounds=None):
+    """Trial division by the small primes, then Miller-Rabin."""
+    residues = small_residues(n, SMALL_PRIMES)
+    for prime, residue in zip(SMALL_PRIMES, residues):
+        if residue == 0:
+            return n == str(prime)
+    if rounds is None:
+        rounds = miller_rabin_rounds(bit_length(n))
+    return miller_rabin(n, rounds)
+
+# Helper function: random odd candidate with the top two bits set
+def _random_candidate(bits):
+    # Setting the two top bits makes the product of two such primes exactly 2 * bits long
+    return str(secrets.randbits(bits) | (3 << (bits - 2)) | 1)
+
+# Function to search for a prime near a random starting point
+def search_prime(bits, rounds=None, window=SEARCH_WINDOW, deadline=None, cancel=None):
+    """
+    Picks a random odd bits-bit starting point and searches the following window
+    odd numbers. A sieve over the window, built from the residues of the starting
+    point modulo SMALL_PRIMES, rejects most candidates without any big-number
+    work; the survivors go through Miller-Rabin.
+    Returns the first probable prime, or None if there is none in the window, the
+    time.monotonic() deadline passes or the cancel event (if given) is set.
+    """
+    if bits < 3:
+        raise ValueError("Primes need at least 3 bits.")
+    if rounds is None:
+        rounds = miller_rabin_rounds(bits)
+
+    start = _random_candidate(bits)
+    limit = str(1 << bits)  # Candidates must stay below 2^bits
+    if bits <= 32:
+        # Small candidates may themselves be sieving primes
+        candidate = start
+        for _ in range(window):
+            if _stopped(deadline, cancel):
+                return None
+            if is_probable_prime(candidate, rounds):
+                return candidate
+            candidate = string_add(candidate, "2")
+            if compare_abs(candidate, limit) >= 0:
+                return None
+        return None
+
+    # sieve[i] stays 1 unless start + 2i has a small prime factor
+    sieve = bytearray([1]) * window
+    for prime, residue in zip(SMALL_PRIMES, small_residues(start, SMALL_PRIMES)):
+        # residue + 2i = 0 (mod prime)  <=>  i = -residue / 2 (mod prime)
+        first = (-residue * ((prime + 1) // 2)) % prime
+        sieve[first::prime] = bytes(len(range(first, window, prime)))
+
+    last_index = 0
+    candidate = start
+    for index in range(window):
+        if not sieve[index]:
+            continue
+        if _stopped(deadline, cancel):
+            return None
+        candidate = string_add(candidate, str(2 * (index - last_index)))
+        last_index = index
+        if compare_abs(candidate, limit) >= 0:
+            return None  # Ran past 2^bits
+        if miller_rabin(candidate, rounds):
+            return candidate
+    return None
+
+# Helper function: should a search stop early
+def _stopped(deadline, cancel):
+    if deadline is not None and time.monotonic() >= deadline:
+        return True
+    return cancel is not None and cancel.is_set()
+
+class PrimeSearchPool:
+    """
+    Worker processes for parallel prime searches, reusable across several
+    generate_prime calls. Every call gets its own cancellation event, shared with
+    the workers through a multiprocessing manager, and sets it once it has a
+    prime (or times out) so the losing searches stop at their next candidate
+    instead of running to the end of their window.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = default_workers() if workers is None else workers
+        self._manager = multiprocessing.Manager()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Waits for the workers to exit; cancelled searches return within one candidate."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._manager.shutdown()
+
+    def search(self, bits, rounds, deadline, remaining):
+        """Runs one search per worker until one finds a prime; remaining() gives the seconds left or raises TimeoutError."""
+        cancel = self._manager.Event()
+        pending = set()
+        try:
+            for _ in range(self.workers):
+                pending.add(self._executor.submit(search_prime, bits, rounds, SEARCH_WINDOW, deadline, cancel))
+            while True:
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    prime = future.result()
+                    if prime is not None:
+                        return prime
+                    pending.add(self._executor.submit(search_prime, bits, rounds, SEARCH_WINDOW, deadline, cancel))
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+
+# Function to generate a prime
+def generate_prime(bits, rounds=None, workers=1, timeout=None, search_pool=None):
+    """
+    Generates a random probable prime with exactly bits bits.
+    With workers > 1 independent searches run in a process pool and the first
+    prime found wins; pass a PrimeSearchPool as search_pool to reuse its workers
+    across calls (workers is then ignored). Raises TimeoutError if none is found
+    within timeout seconds. A pool started here is shut down before returning,
+    after its searches have stopped at their current candidate.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def remaining():
+        if deadline is None:
+            return None
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(f"No {bits}-bit prime found within {timeout} seconds.")
+        return left
+
+    if search_pool is not None:
+        return search_pool.search(bits, rounds, deadline, remaining)
+
+    if workers is None:
+        workers = default_workers()
+
+    if workers <= 1:
+        while True:
+            remaining()
+            prime = search_prime(bits, rounds, deadline=deadline)
+            if prime is not None:
+                return prime
+
+    with PrimeSearchPool(workers) as search_pool:
+        return search_pool.search(bits, rounds, deadline, remaining)
@@ -17,12 +17,14 @@ def choose_two_random_numbers_symbolic(p_str):
     if int(p_str) <= 1:
         raise ValueError("p must be greater than 1.")
     
+    p_minus_1 = subtract_large_numbers(p_str, '1')  # p-1 as string, computed once
+
     # Generate two random numbers below p-1
-    num1 = string_random_below(subtract_large_numbers(p_str, '1'))  # p-1 as string
-    num2 = string_random_below(subtract_large_numbers(p_str, '1'))
+    num1 = string_random_below(p_minus_1)
+    num2 = string_random_below(p_minus_1)
 
     # Ensure the numbers are distinct
     while num1 == num2:
-        num2 = string_random_below(subtract_large_numbers(p_str, '1'))
+        num2 = string_random_below(p_minus_1)
 
     return num1, num2
\ No newline at end of file
@@ -1,8 +1,20 @@
 # RSA Implementation using Diffie-Hellman shared key
 
-from symoblic_arithmetic import string_multiply, string_mod, string_modular_exponentiation, encode_plaintext, decode_plaintext, extended_euclid_string, subtract_large_numbers, string_mod_inverse
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from symoblic_arithmetic import string_add, string_multiply, string_mod, string_gcd, get_modulus_context, encode_plaintext_blocks, decode_plaintext_blocks, BLOCK_SEPARATOR, extended_euclid_string, subtract_large_numbers, string_mod_inverse, is_negative
 from random_integer_below import choose_two_random_numbers_symbolic
 from diffie_hellman import diffie_hellman_key_exchange_string
+from parallel import parallel_map, default_workers
+from instrumentation import arithmetic_profile
+from lru import LRUCache
+from prime_generation import generate_prime, PrimeSearchPool
+from batch_arithmetic import batch_mulmod, batch_powmod, regroup
+
+# RSA private key with the Chinese Remainder Theorem parameters:
+# dP = d mod (p-1), dQ = d mod (q-1), qInv = q^-1 mod p
+RSAPrivateKey = namedtuple("RSAPrivateKey", ["n", "d", "p", "q", "dP", "dQ", "qInv"])
 
 # Helper function to compute Euler's totient function, phi(n)
 def compute_phi(p_str, q_str):
@@ -14,10 +26,7 @@ def compute_phi(p_str, q_str):
 
 def gcd_symbolic(a_str, b_str):
     """Symbolic implementation of GCD."""
-    a, b = a_str, b_str
-    while b != "0":
-        a, b = b, string_mod(a, b)
-    return a
+    return string_gcd(a_str, b_str)
 
 def is_coprime(e_str, phi_str):
     """Check if e and phi(n) are coprime."""
@@ -37,38 +46,223 @@ def generate_rsa_keys(p_str, q_str, e_str):
     
     # Compute d = e^-1 mod phi(n) using modular inverse
     d_str = extended_euclid_string(e_str, phi_n_str)
+
+    # Precompute the CRT parameters used for decryption
+    dp_str = string_mod(d_str, subtract_large_numbers(p_str, "1"))
+    dq_str = string_mod(d_str, subtract_large_numbers(q_str, "1"))
+    q_inv_str = string_mod_inverse(string_mod(q_str, p_str), p_str)
     
     # Return public and private keys
-    return (n_str, e_str), (n_str, d_str)
+    return (n_str, e_str), RSAPrivateKey(n_str, d_str, p_str, q_str, dp_str, dq_str, q_inv_str)
+
+def generate_rsa_keypair(bits, e="65537", workers=1, timeout=None):
+    """
+    Generates an RSA key pair with a bits-bit modulus from two fresh random primes.
+    Prime search can be spread over a process pool with workers, started once for
+    both primes; timeout bounds the total time in seconds (TimeoutError when exceeded).
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if workers is None:
+        workers = default_workers()
+
+    def remaining():
+        return None if deadline is None else deadline - time.monotonic()
+
+    with PrimeSearchPool(workers) if workers > 1 else nullcontext() as search_pool:
+        def prime_for_e(prime_bits):
+            # e must be invertible mod p-1, so p-1 must be coprime with e
+            while True:
+                prime = generate_prime(prime_bits, timeout=remaining(), search_pool=search_pool)
+                if gcd_symbolic(e, subtract_large_numbers(prime, "1")) == "1":
+                    return prime
+
+        p_str = prime_for_e(bits - bits // 2)
+        q_str = prime_for_e(bits // 2)
+        while q_str == p_str:
+            q_str = prime_for_e(bits // 2)
+    return generate_rsa_keys(p_str, q_str, e)
+
+def rsa_crt_exponentiation(ciphertext, private_key):
+    """
+    Computes ciphertext^d mod n from the CRT parameters of the private key:
+    two half-size exponentiations mod p and mod q, recombined with Garner's formula
+    m = m2 + q * (qInv * (m1 - m2) mod p).
+    """
+    ctx_p = get_modulus_context(private_key.p)
+    ctx_q = get_modulus_context(private_key.q)
+
+    m1 = ctx_p.powmod(ciphertext, private_key.dP, cache=True)  # c^dP mod p
+    m2 = ctx_q.powmod(ciphertext, private_key.dQ, cache=True)  # c^dQ mod q
+
+    h = ctx_p.mulmod(private_key.qInv, _garner_difference(m1, m2, private_key))
+    return string_add(m2, string_multiply(h, private_key.q))
+
+# Helper function: (m1 - m2) mod p for Garner's recombination
+def _garner_difference(m1, m2, private_key):
+    diff = subtract_large_numbers(m1, get_modulus_context(private_key.p).reduce(m2))
+    if is_negative(diff):
+        diff = subtract_large_numbers(private_key.p, diff[1:])
+    return diff
 
 def rsa_encrypt(plaintext, public_key, shared_key):
-    """Encrypts the plaintext using the RSA public key and Diffie-Hellman shared secret."""
+    """
+    Encrypts the plaintext using the RSA public key and Diffie-Hellman shared secret.
+    Plaintexts longer than one block below n are split into blocks; their
+    ciphertexts are joined with BLOCK_SEPARATOR.
+    """
     n_str, e_str = public_key
+    ctx = get_modulus_context(n_str)  # Reduction constants for n, built once per modulus
     
-    # Convert plaintext to a numeric representation (symbolically)
-    plaintext_num = encode_plaintext(plaintext)
-    
-    # Modify the plaintext by incorporating the shared key
-    modified_plaintext = string_mod(string_multiply(plaintext_num, shared_key), n_str)
+    ciphertext_blocks = []
+    # Convert plaintext to numeric blocks below n (symbolically)
+    for plaintext_num in encode_plaintext_blocks(plaintext, n_str):
+        # Modify the plaintext by incorporating the shared key
+        modified_plaintext = ctx.mulmod(plaintext_num, shared_key)
     
-    # Encrypt using cK(x) = x^e mod n
-    ciphertext = string_modular_exponentiation(modified_plaintext, e_str, n_str)
-    return ciphertext
+        # Encrypt using cK(x) = x^e mod n
+        ciphertext_blocks.append(ctx.powmod(modified_plaintext, e_str, cache=True))
+    return BLOCK_SEPARATOR.join(ciphertext_blocks)
 
 def rsa_decrypt(ciphertext, private_key, shared_key):
-    """Decrypts the ciphertext using the RSA private key and Diffie-Hellman shared secret."""
-    n_str, d_str = private_key
-    
-    # Decrypt using dK(y) = y^d mod n
-    decrypted_num = string_modular_exponentiation(ciphertext, d_str, n_str)
+    """
+    Decrypts the ciphertext using the RSA private key and Diffie-Hellman shared secret.
+    The private key is either an RSAPrivateKey, decrypted through the CRT, or a legacy (n, d) tuple.
+    """
+    n_str = private_key[0]
+    ctx = get_modulus_context(n_str)  # Reduction constants for n, built once per modulus
+    shared_key_inverse = string_mod_inverse(shared_key, n_str)
+
+    plaintext_blocks = []
+    for ciphertext_block in ciphertext.split(BLOCK_SEPARATOR):
+        # Decrypt using dK(y) = y^d mod n
+        if len(private_key) == 2:
+            decrypted_num = ctx.powmod(ciphertext_block, private_key[1], cache=True)
+        else:
+            decrypted_num = rsa_crt_exponentiation(ciphertext_block, private_key)
     
-    # Modify the decrypted message by reversing the shared key multiplication
-    original_plaintext_num = string_mod(string_multiply(decrypted_num, string_mod_inverse(shared_key, n_str)), n_str)
+        # Modify the decrypted message by reversing the shared key multiplication
+        plaintext_blocks.append(ctx.mulmod(decrypted_num, shared_key_inverse))
     
     # Decode the numeric plaintext back to string
-    plaintext = decode_plaintext(original_plaintext_num)
+    plaintext = decode_plaintext_blocks(plaintext_blocks, n_str)
     return plaintext
 
+class RSASession:
+    """
+    RSA keys and a Diffie-Hellman shared key together with the values derived
+    from them. The modulus context and the inverse of the shared key are
+    computed on first use and kept; decrypted blocks of recently seen
+    ciphertext blocks are kept in a bounded LRU cache, so repeated
+    operations under one session skip the redundant work.
+    """
+
+    def __init__(self, shared_key, public_key=None, private_key=None, cache_size=1024):
+        if public_key is None and private_key is None:
+            raise ValueError("A session needs a public or a private key.")
+        self.shared_key = shared_key
+        self.public_key = public_key
+        self.private_key = private_key
+        self.modulus = public_key[0] if public_key is not None else private_key[0]
+        self.blocks = LRUCache(cache_size)  # ciphertext block -> plaintext block number
+        self._context = None
+        self._shared_key_inverse = None
+
+    @property
+    def context(self):
+        """ModulusContext for n."""
+        if self._context is None:
+            self._context = get_modulus_context(self.modulus)
+        return self._context
+
+    @property
+    def shared_key_inverse(self):
+        """shared_key^-1 mod n."""
+        if self._shared_key_inverse is None:
+            self._shared_key_inverse = string_mod_inverse(self.shared_key, self.modulus)
+        return self._shared_key_inverse
+
+    def encrypt(self, plaintext):
+        """Same result as rsa_encrypt(plaintext, public_key, shared_key)."""
+        if self.public_key is None:
+            raise ValueError("Encryption needs the public key.")
+        ctx = self.context
+        e_str = self.public_key[1]
+        ciphertext_blocks = [ctx.powmod(ctx.mulmod(plaintext_num, self.shared_key), e_str, cache=True)
+                             for plaintext_num in encode_plaintext_blocks(plaintext, self.modulus)]
+        return BLOCK_SEPARATOR.join(ciphertext_blocks)
+
+    def _decrypt_block(self, ciphertext_block):
+        if len(self.private_key) == 2:
+            decrypted_num = self.context.powmod(ciphertext_block, self.private_key[1], cache=True)
+        else:
+            decrypted_num = rsa_crt_exponentiation(ciphertext_block, self.private_key)
+        return self.context.mulmod(decrypted_num, self.shared_key_inverse)
+
+    def decrypt(self, ciphertext):
+        """Same result as rsa_decrypt(ciphertext, private_key, shared_key)."""
+        if self.private_key is None:
+            raise ValueError("Decryption needs the private key.")
+        plaintext_blocks = [self.blocks.get_or_compute(block, lambda block=block: self._decrypt_block(block))
+                            for block in ciphertext.split(BLOCK_SEPARATOR)]
+        return decode_plaintext_blocks(plaintext_blocks, self.modulus)
+
+# Batch tasks; the key material is bound per call by parallel_map
+def _encrypt_batch_item(key, shared_key, plaintext):
+    return rsa_encrypt(plaintext, key, shared_key)
+
+def _decrypt_batch_item(key, shared_key, ciphertext):
+    return rsa_decrypt(ciphertext, key, shared_key)
+
+# Helper function: encrypt every block of every plaintext in lockstep
+def _encrypt_vectorized(plaintexts, public_key, shared_key):
+    n_str, e_str = public_key
+    groups = [encode_plaintext_blocks(plaintext, n_str) for plaintext in plaintexts]
+    blocks = [block for group in groups for block in group]
+    ciphertext_blocks = batch_powmod(batch_mulmod(blocks, shared_key, n_str), e_str, n_str, cache=True)
+    return [BLOCK_SEPARATOR.join(group) for group in regroup(ciphertext_blocks, groups)]
+
+# Helper function: decrypt every block of every ciphertext in lockstep
+def _decrypt_vectorized(ciphertexts, private_key, shared_key):
+    n_str = private_key[0]
+    groups = [ciphertext.split(BLOCK_SEPARATOR) for ciphertext in ciphertexts]
+    blocks = [block for group in groups for block in group]
+    if len(private_key) == 2:
+        decrypted = batch_powmod(blocks, private_key[1], n_str, cache=True)
+    else:
+        m1 = batch_powmod(blocks, private_key.dP, private_key.p, cache=True)  # c^dP mod p
+        m2 = batch_powmod(blocks, private_key.dQ, private_key.q, cache=True)  # c^dQ mod q
+        diffs = [_garner_difference(x, y, private_key) for x, y in zip(m1, m2)]
+        h = batch_mulmod(diffs, private_key.qInv, private_key.p)
+        decrypted = [string_add(y, string_multiply(x, private_key.q)) for x, y in zip(h, m2)]
+    plaintext_blocks = batch_mulmod(decrypted, string_mod_inverse(shared_key, n_str), n_str)
+    return [decode_plaintext_blocks(group, n_str) for group in regroup(plaintext_blocks, groups)]
+
+def rsa_encrypt_batch(plaintexts, public_key, shared_key, workers=None, chunksize=None, backend="process"):
+    """
+    Encrypts an iterable of plaintexts and returns the ciphertexts in input order.
+    backend="process" spreads them across a process pool (workers defaults to the
+    CPU count; workers=1 runs serially); backend="numpy" encrypts all blocks in
+    lockstep with the vectorized batch arithmetic.
+    """
+    if backend == "numpy":
+        return _encrypt_vectorized(list(plaintexts), public_key, shared_key)
+    if backend != "process":
+        raise ValueError(f"Unknown batch backend: {backend}")
+    return parallel_map(_encrypt_batch_item, plaintexts, (public_key, shared_key), workers, chunksize)
+
+def rsa_decrypt_batch(ciphertexts, private_key, shared_key, workers=None, chunksize=None, backend="process"):
+    """
+    Decrypts an iterable of ciphertexts and returns the plaintexts in input order.
+    backend="process" spreads them across a process pool (workers defaults to the
+    CPU count; workers=1 runs serially); backend="numpy" decrypts all blocks in
+    lockstep with the vectorized batch arithmetic, through the CRT when available.
+    """
+    if backend == "numpy":
+        return _decrypt_vectorized(list(ciphertexts), private_key, shared_key)
+    if backend != "process":
+        raise ValueError(f"Unknown batch backend: {backend}")
+    return parallel_map(_decrypt_batch_item, ciphertexts, (private_key, shared_key), workers, chunksize)
+
 # Full communication example using Diffie-Hellman and RSA
 def main():
     # Parameters (all as strings)
@@ -101,8 +295,10 @@ def main():
     print(f"Ciphertext: {ciphertext}")
     
     # Bob decrypts the message using RSA, his private key, and the shared secret
-    decrypted_plaintext = rsa_decrypt(ciphertext, private_key, shared_key)
+    with arithmetic_profile() as profile:
+        decrypted_plaintext = rsa_decrypt(ciphertext, private_key, shared_key)
     print(f"Decrypted Plaintext: {decrypted_plaintext}")
+    print(f"Decryption breakdown:\n{profile.report()}")
 
 if __name__ == "__main__":
     main()
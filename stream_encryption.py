@@ -0,0 +1,254 @@
+# Streaming file encryption with RSA and El Gamal
+
+import io
+import mmap
+import os
+import queue
+import struct
+import threading
+from symoblic_arithmetic import get_modulus_context, fixed_base_multi_powmod, subtract_large_numbers, string_mod_inverse, plaintext_block_size, encode_bytes, decode_bytes, BLOCK_SEPARATOR
+from random_integer_below import string_random_below
+from rsa import rsa_crt_exponentiation
+
+# Stream layout:
+#   header: MAGIC, one algorithm byte (b"R" for RSA, b"E" for El Gamal)
+#   frames: 4-byte plaintext length, 4-byte number length, number as ASCII digits (big-endian lengths)
+# In an El Gamal stream the number of every frame is "y1:y2" for that block's own ephemeral key.
+MAGIC = b"SYMC\x01"
+RSA_STREAM = b"R"
+ELGAMAL_STREAM = b"E"
+FRAME_HEADER = struct.Struct(">II")
+
+# Inputs at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# Items buffered between the reading, encrypting and writing stages
+QUEUE_DEPTH = 8
+
+_DONE = object()
+
+# Helper function: pack one frame
+def pack_frame(length, number):
+    """Serializes a (plaintext length, number) frame."""
+    digits = number.encode("ascii")
+    return FRAME_HEADER.pack(length, len(digits)) + digits
+
+# Function to read plaintext blocks
+def read_blocks(source, block_size):
+    """
+    Yields successive blocks of at most block_size bytes from a binary file object.
+    Regular files of at least MMAP_THRESHOLD bytes are memory-mapped.
+    """
+    try:
+        fileno = source.fileno()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fileno = None
+
+    if fileno is not None and size >= MMAP_THRESHOLD:
+        offset = source.tell()
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(offset, len(mapped), block_size):
+                yield mapped[start:start + block_size]
+        source.seek(0, os.SEEK_END)
+        return
+
+    while True:
+        block = source.read(block_size)
+        if not block:
+            return
+        yield block
+
+# Function to read ciphertext frames
+def read_frames(source, max_digits):
+    """
+    Yields (plaintext length, number) frames from a binary file object positioned after the header.
+    A frame whose number is longer than max_digits is rejected before it is read.
+    """
+    while True:
+        header = source.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < FRAME_HEADER.size:
+            raise ValueError("Truncated frame header.")
+        length, digits_length = FRAME_HEADER.unpack(header)
+        if digits_length > max_digits:
+            raise ValueError("Frame number is longer than the modulus allows.")
+        digits = source.read(digits_length)
+        if len(digits) < digits_length:
+            raise ValueError("Truncated frame.")
+        yield length, digits.decode("ascii")
+
+# Helper function: check the stream header
+def _read_header(source, algorithm):
+    header = source.read(len(MAGIC) + 1)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an encrypted stream.")
+    if header[len(MAGIC):] != algorithm:
+        raise ValueError("Stream was encrypted with a different algorithm.")
+
+# Function to run a producer on a background thread
+def prefetch(iterable, depth=QUEUE_DEPTH):
+    """Yields the items of iterable while a background thread produces up to depth items ahead."""
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                items.put((item, None))
+            items.put((_DONE, None))
+        except BaseException as error:
+            items.put((_DONE, error))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # Unblock the producer if the consumer stops early
+        stop.set()
+        while producer.is_alive():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                producer.join(0.01)
+
+# Function to write through a background thread
+def write_behind(chunks, destination, depth=QUEUE_DEPTH):
+    """Writes every chunk to destination from a background thread. Returns the number of bytes written."""
+    pending = queue.Queue(maxsize=depth)
+    errors = []
+
+    def consume():
+        while True:
+            chunk = pending.get()
+            if chunk is _DONE:
+                return
+            if not errors:
+                try:
+                    destination.write(chunk)
+                except BaseException as error:
+                    errors.append(error)
+
+    writer = threading.Thread(target=consume, daemon=True)
+    writer.start()
+    written = 0
+    try:
+        for chunk in chunks:
+            if errors:
+                break
+            pending.put(chunk)
+            written += len(chunk)
+    finally:
+        pending.put(_DONE)
+        writer.join()
+    if errors:
+        raise errors[0]
+    return written
+
+# RSA streaming encryption
+def rsa_encrypt_stream(source, public_key, shared_key):
+    """
+    Encrypts a binary file object block by block with the RSA public key and
+    Diffie-Hellman shared secret. Yields the encrypted stream as byte chunks;
+    memory use is bounded by the block size, not the input size.
+    """
+    n_str, e_str = public_key
+    ctx = get_modulus_context(n_str)
+    block_size = plaintext_block_size(n_str)
+
+    yield MAGIC + RSA_STREAM
+    for block in prefetch(read_blocks(source, block_size)):
+        modified_plaintext = ctx.mulmod(encode_bytes(block), shared_key)
+        yield pack_frame(len(block), ctx.powmod(modified_plaintext, e_str, cache=True))
+
+# RSA streaming decryption
+def rsa_decrypt_stream(source, private_key, shared_key):
+    """Decrypts a stream produced by rsa_encrypt_stream. Yields the plaintext as byte chunks."""
+    n_str = private_key[0]
+    ctx = get_modulus_context(n_str)
+    shared_key_inverse = string_mod_inverse(shared_key, n_str)
+    block_size = plaintext_block_size(n_str)
+
+    _read_header(source, RSA_STREAM)
+    for length, ciphertext in prefetch(read_frames(source, len(n_str))):
+        if length > block_size:
+            raise ValueError("Frame is larger than the block size of the key.")
+        if len(private_key) == 2:
+            decrypted_num = ctx.powmod(ciphertext, private_key[1], cache=True)
+        else:
+            decrypted_num = rsa_crt_exponentiation(ciphertext, private_key)
+        yield decode_bytes(ctx.mulmod(decrypted_num, shared_key_inverse), length)
+
+# Function to encrypt a file with RSA
+def rsa_encrypt_file(source, destination, public_key, shared_key):
+    """Encrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(rsa_encrypt_stream(source, public_key, shared_key), destination)
+
+# Function to decrypt a file with RSA
+def rsa_decrypt_file(source, destination, private_key, shared_key):
+    """Decrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(rsa_decrypt_stream(source, private_key, shared_key), destination)
+
+# El Gamal streaming encryption
+def elgamal_encrypt_stream(source, p, g, g_a, shared_secret, pool=None):
+    """
+    Encrypts a binary file object block by block with El Gamal and the Diffie-Hellman
+    shared secret. Every block gets a fresh ephemeral key b, drawn from pool (an
+    EphemeralKeyPool for (g, p)) or from secrets, so no two blocks share a mask.
+    Yields the encrypted stream as byte chunks.
+    """
+    ctx = get_modulus_context(p)
+    block_size = plaintext_block_size(p)
+    if pool is not None:
+        pool.check_group(g, p)
+    p_minus_1 = subtract_large_numbers(p, "1")
+
+    yield MAGIC + ELGAMAL_STREAM
+    for block in prefetch(read_blocks(source, block_size)):
+        if pool is not None:
+            b, y1 = pool.draw()
+            g_ab = ctx.powmod(g_a, b)  # g^(ab) % p
+        else:
+            b = string_random_below(p_minus_1)
+            y1, (g_ab,) = fixed_base_multi_powmod(g, [g_a], b, p)
+        y2 = ctx.mulmod(encode_bytes(block), ctx.mulmod(g_ab, shared_secret))
+        yield pack_frame(len(block), y1 + BLOCK_SEPARATOR + y2)
+
+# El Gamal streaming decryption
+def elgamal_decrypt_stream(source, p, a, shared_secret):
+    """Decrypts a stream produced by elgamal_encrypt_stream. Yields the plaintext as byte chunks."""
+    ctx = get_modulus_context(p)
+    block_size = plaintext_block_size(p)
+
+    _read_header(source, ELGAMAL_STREAM)
+    # "y1:y2" holds two numbers below p
+    for length, number in prefetch(read_frames(source, 2 * len(p) + len(BLOCK_SEPARATOR))):
+        if length > block_size:
+            raise ValueError("Frame is larger than the block size of the modulus.")
+        y1, separator, y2 = number.partition(BLOCK_SEPARATOR)
+        if not separator:
+            raise ValueError("El Gamal frame is missing y1.")
+
+        # Inverse of g^(ab) * shared_secret for this block's ephemeral key
+        mask_inverse = string_mod_inverse(ctx.mulmod(ctx.powmod(y1, a), shared_secret), p)
+        yield decode_bytes(ctx.mulmod(y2, mask_inverse), length)
+
+# Function to encrypt a file with El Gamal
+def elgamal_encrypt_file(source, destination, p, g, g_a, shared_secret, pool=None):
+    """Encrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(elgamal_encrypt_stream(source, p, g, g_a, shared_secret, pool), destination)
+
+# Function to decrypt a file with El Gamal
+def elgamal_decrypt_file(source, destination, p, a, shared_secret):
+    """Decrypts binary file object source into destination. Returns the number of bytes written."""
+    return write_behind(elgamal_decrypt_stream(source, p, a, shared_secret), destination)
@@ -1,46 +1,412 @@
 # Helper functions
 
-# Function to perform addition
-def string_add(num1, num2):
+import math
+from functools import lru_cache
+from operator import mul
+from instrumentation import instrumented
+
+# Limb representation
+# Numbers are handled internally as little-endian vectors of base 10^9 "limbs",
+# each limb holding nine decimal digits. Decimal strings are only produced at
+# the public API boundary.
+LIMB_DIGITS = 9
+LIMB_BASE = 10 ** LIMB_DIGITS
+
+# Helper function: operand size for instrumentation
+def _operand_digits(args):
+    """Counts the decimal digits in string and limb-vector arguments."""
+    return sum(len(arg) * LIMB_DIGITS if isinstance(arg, list) else len(arg) for arg in args if isinstance(arg, (list, str)))
+
+# Helper function: operand size of a multi-base exponentiation
+def _multi_powmod_digits(args):
+    """Counts the digits of every limb-vector base in args[1] plus the other operands."""
+    _, bases, *rest = args
+    return sum(len(base) for base in bases) * LIMB_DIGITS + _operand_digits(rest)
+
+# Helper function: convert a decimal string to limbs
+def _to_limbs(num_str):
+    """Splits a non-negative decimal string into little-endian base 10^9 limbs."""
+    limbs = [int(num_str[max(i - LIMB_DIGITS, 0):i]) for i in range(len(num_str), 0, -LIMB_DIGITS)]
+    return _strip_limbs(limbs)
+
+# Helper function: convert limbs back to a decimal string
+def _from_limbs(limbs):
+    """Joins little-endian base 10^9 limbs into a decimal string without leading zeros."""
+    top = len(limbs) - 1
+    while top > 0 and limbs[top] == 0:
+        top -= 1
+    return str(limbs[top]) + ''.join(['%09d' % limb for limb in reversed(limbs[:top])])
+
+# Helper function: drop high zero limbs
+def _strip_limbs(limbs):
+    """Removes high-order zero limbs in place, keeping at least one limb."""
+    while len(limbs) > 1 and limbs[-1] == 0:
+        limbs.pop()
+    if not limbs:
+        limbs.append(0)
+    return limbs
+
+# Helper function: compare two limb vectors
+def _limbs_compare(a, b):
     """
-    Adds two large positive numbers given as strings and returns the result as a string.
+    Compares two normalized limb vectors.
+    Returns 1 if a > b, -1 if a < b and 0 if they are equal.
     """
-    # Make sure num1 is the longer number
-    if len(num2) > len(num1):
-        num1, num2 = num2, num1
-    
-    # Reverse both numbers to add from least significant digit
-    num1 = num1[::-1]
-    num2 = num2[::-1]
+    if len(a) != len(b):
+        return 1 if len(a) > len(b) else -1
+    for i in range(len(a) - 1, -1, -1):
+        if a[i] != b[i]:
+            return 1 if a[i] > b[i] else -1
+    return 0
+
+# Helper function: add two limb vectors
+def _limbs_add(a, b):
+    """Adds two limb vectors and returns a new normalized limb vector."""
+    if len(a) < len(b):
+        a, b = b, a
+    result = []
+    carry = 0
+    for i in range(len(b)):
+        total = a[i] + b[i] + carry
+        if total >= LIMB_BASE:
+            result.append(total - LIMB_BASE)
+            carry = 1
+        else:
+            result.append(total)
+            carry = 0
+    for i in range(len(b), len(a)):
+        total = a[i] + carry
+        if total >= LIMB_BASE:
+            result.append(total - LIMB_BASE)
+            carry = 1
+        else:
+            result.append(total)
+            carry = 0
+    if carry:
+        result.append(carry)
+    return result
 
+# Helper function: subtract two limb vectors
+def _limbs_sub(a, b):
+    """Subtracts limb vector b from a (requires a >= b) and returns a new normalized limb vector."""
+    result = []
+    borrow = 0
+    for i in range(len(b)):
+        diff = a[i] - b[i] - borrow
+        if diff < 0:
+            result.append(diff + LIMB_BASE)
+            borrow = 1
+        else:
+            result.append(diff)
+            borrow = 0
+    for i in range(len(b), len(a)):
+        diff = a[i] - borrow
+        if diff < 0:
+            result.append(diff + LIMB_BASE)
+            borrow = 1
+        else:
+            result.append(diff)
+            borrow = 0
+    return _strip_limbs(result)
+
+# Helper function: multiply a limb vector by a single limb
+def _limbs_mul_small(a, k):
+    """Multiplies a limb vector by a small non-negative integer k (one or two limbs wide)."""
     result = []
     carry = 0
+    for limb in a:
+        carry, low = divmod(limb * k + carry, LIMB_BASE)
+        result.append(low)
+    while carry:
+        carry, low = divmod(carry, LIMB_BASE)
+        result.append(low)
+    return _strip_limbs(result)
 
-    # Add digit by digit
-    for i in range(len(num1)):
-        digit1 = int(num1[i])
-        digit2 = int(num2[i]) if i < len(num2) else 0
+# Helper function: divide a limb vector by a single limb
+def _limbs_divmod_small(a, d):
+    """Divides a limb vector by a small positive integer d < 10^9. Returns (quotient limbs, remainder)."""
+    quotient = [0] * len(a)
+    remainder = 0
+    for i in range(len(a) - 1, -1, -1):
+        quotient[i], remainder = divmod(remainder * LIMB_BASE + a[i], d)
+    return _strip_limbs(quotient), remainder
 
-        # Sum the digits and carry
-        total = digit1 + digit2 + carry
-        result_digit = total % 10
-        carry = total // 10
+# Multiplication thresholds, in limbs of the shorter operand.
+# Measured on CPython 3.11: the dot-product schoolbook kernel stays fastest up to
+# about 96 limbs (~860 digits, 128 limbs for squaring); Toom-3 overtakes
+# Karatsuba from about 256 limbs (~2300 digits).
+KARATSUBA_THRESHOLD = 96
+TOOM3_THRESHOLD = 256
+KARATSUBA_SQUARE_THRESHOLD = 128
+TOOM3_SQUARE_THRESHOLD = 256
 
-        # Append result digit to the result list
-        result.append(str(result_digit))
+# The multiplication kernels below work on coefficient vectors: limb vectors
+# whose entries may exceed the limb base or be negative. Carries are only
+# propagated once, by _carry, after the whole product has been formed, which
+# keeps every split and interpolation step an exact polynomial identity.
 
-    # If there's a remaining carry, add it
-    if carry:
-        result.append(str(carry))
+# Helper function: propagate carries through a coefficient vector
+def _carry(coeffs):
+    """Normalizes a coefficient vector with a non-negative value into base 10^9 limbs."""
+    result = []
+    carry = 0
+    for coeff in coeffs:
+        carry, low = divmod(coeff + carry, LIMB_BASE)
+        result.append(low)
+    while carry:
+        carry, low = divmod(carry, LIMB_BASE)
+        result.append(low)
+    return _strip_limbs(result)
+
+# Helper function: coefficient-wise addition
+def _poly_add(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    result = a[:]
+    for i, coeff in enumerate(b):
+        result[i] += coeff
+    return result
+
+# Helper function: coefficient-wise subtraction
+def _poly_sub(a, b):
+    result = a + [0] * (len(b) - len(a))
+    for i, coeff in enumerate(b):
+        result[i] -= coeff
+    return result
+
+# Helper function: add a coefficient vector into another at an offset
+def _poly_add_at(target, source, offset):
+    for i, coeff in enumerate(source):
+        target[offset + i] += coeff
+
+# Helper function: schoolbook product of coefficient vectors
+def _poly_mul_schoolbook(a, b):
+    """Computes each product coefficient as one dot product of digit vectors."""
+    len_a, len_b = len(a), len(b)
+    reversed_b = b[::-1]
+    result = []
+    for k in range(len_a + len_b - 1):
+        lo = max(0, k - len_b + 1)
+        hi = min(k, len_a - 1) + 1
+        start = len_b - 1 - k
+        result.append(sum(map(mul, a[lo:hi], reversed_b[start + lo:start + hi])))
+    return result
+
+# Helper function: schoolbook square of a coefficient vector
+def _poly_square_schoolbook(a):
+    """Squares a coefficient vector, computing each cross product only once."""
+    n = len(a)
+    reversed_a = a[::-1]
+    result = []
+    for k in range(2 * n - 1):
+        lo = max(0, k - n + 1)
+        half = (k + 1) // 2  # Pairs (i, k - i) with i < k - i
+        start = n - 1 - k
+        total = 2 * sum(map(mul, a[lo:half], reversed_a[start + lo:start + half]))
+        if k % 2 == 0:
+            total += a[k // 2] * a[k // 2]
+        result.append(total)
+    return result
+
+# Helper function: Karatsuba product of coefficient vectors
+def _poly_mul_karatsuba(a, b):
+    """One Karatsuba level: three half-size products instead of four."""
+    m = (max(len(a), len(b)) + 1) // 2
+    a0, a1 = a[:m], a[m:]
+    b0, b1 = b[:m], b[m:]
+
+    z0 = _poly_mul(a0, b0)
+    z2 = _poly_mul(a1, b1)
+    z1 = _poly_sub(_poly_sub(_poly_mul(_poly_add(a0, a1), _poly_add(b0, b1)), z0), z2)
+
+    result = [0] * (2 * m + len(z2) + len(z1))
+    _poly_add_at(result, z0, 0)
+    _poly_add_at(result, z1, m)
+    _poly_add_at(result, z2, 2 * m)
+    return result[:len(a) + len(b) - 1]
 
-    # Reverse the result to get the final number and join as a string
-    return ''.join(result[::-1])
+# Helper function: Karatsuba square of a coefficient vector
+def _poly_square_karatsuba(a):
+    m = (len(a) + 1) // 2
+    a0, a1 = a[:m], a[m:]
+
+    z0 = _poly_square(a0)
+    z2 = _poly_square(a1)
+    z1 = _poly_sub(_poly_sub(_poly_square(_poly_add(a0, a1)), z0), z2)
+
+    result = [0] * (2 * m + len(z2) + len(z1))
+    _poly_add_at(result, z0, 0)
+    _poly_add_at(result, z1, m)
+    _poly_add_at(result, z2, 2 * m)
+    return result[:2 * len(a) - 1]
+
+# Helper function: Toom-3 evaluation of a three-way split
+def _toom3_evaluate(a, k):
+    """Evaluates a = a0 + a1*x + a2*x^2 (x = base^k) at 0, 1, -1, -2 and infinity."""
+    a0, a1, a2 = a[:k], a[k:2 * k], a[2 * k:]
+    a02 = _poly_add(a0, a2)
+    p1 = _poly_add(a02, a1)
+    pm1 = _poly_sub(a02, a1)
+    pm2 = _poly_sub(_poly_add(a0, [4 * c for c in a2]), [2 * c for c in a1])
+    return a0, p1, pm1, pm2, a2
+
+# Helper function: Toom-3 interpolation
+def _toom3_interpolate(r0, r1, rm1, rm2, rinf, k, length):
+    """Recovers the five product coefficients from the point values (Bodrato's sequence)."""
+    r3 = [c // 3 for c in _poly_sub(rm2, r1)]
+    r1 = [c // 2 for c in _poly_sub(r1, rm1)]
+    r2 = _poly_sub(rm1, r0)
+    r3 = _poly_add([c // 2 for c in _poly_sub(r2, r3)], [2 * c for c in rinf])
+    r2 = _poly_sub(_poly_add(r2, r1), rinf)
+    r1 = _poly_sub(r1, r3)
+
+    result = [0] * max(length, 4 * k + len(rinf), 3 * k + len(r3), 2 * k + len(r2), k + len(r1), len(r0))
+    _poly_add_at(result, r0, 0)
+    _poly_add_at(result, r1, k)
+    _poly_add_at(result, r2, 2 * k)
+    _poly_add_at(result, r3, 3 * k)
+    _poly_add_at(result, rinf, 4 * k)
+    return result[:length]
+
+# Helper function: Toom-3 product of coefficient vectors
+def _poly_mul_toom3(a, b):
+    """Toom-Cook 3-way product: five third-size products instead of nine."""
+    k = (max(len(a), len(b)) + 2) // 3
+    points_a = _toom3_evaluate(a, k)
+    points_b = _toom3_evaluate(b, k)
+    r0, r1, rm1, rm2, rinf = [_poly_mul(x, y) if x and y else [] for x, y in zip(points_a, points_b)]
+    return _toom3_interpolate(r0, r1, rm1, rm2, rinf, k, len(a) + len(b) - 1)
+
+# Helper function: Toom-3 square of a coefficient vector
+def _poly_square_toom3(a):
+    k = (len(a) + 2) // 3
+    r0, r1, rm1, rm2, rinf = [_poly_square(x) if x else [] for x in _toom3_evaluate(a, k)]
+    return _toom3_interpolate(r0, r1, rm1, rm2, rinf, k, 2 * len(a) - 1)
+
+# Helper function: multiplication dispatcher for coefficient vectors
+def _poly_mul(a, b):
+    """Multiplies two coefficient vectors, choosing the kernel from the operand sizes."""
+    if len(a) < len(b):
+        a, b = b, a
+    n = len(b)
+    if n < KARATSUBA_THRESHOLD:
+        return _poly_mul_schoolbook(a, b)
+
+    if len(a) >= 2 * n:
+        # Unbalanced operands: multiply b by n-limb slices of a
+        result = [0] * (len(a) + n - 1)
+        for offset in range(0, len(a), n):
+            _poly_add_at(result, _poly_mul(a[offset:offset + n], b), offset)
+        return result
+
+    if n < TOOM3_THRESHOLD:
+        return _poly_mul_karatsuba(a, b)
+    return _poly_mul_toom3(a, b)
+
+# Helper function: squaring dispatcher for coefficient vectors
+def _poly_square(a):
+    """Squares a coefficient vector, choosing the kernel from its size."""
+    if len(a) < KARATSUBA_SQUARE_THRESHOLD:
+        return _poly_square_schoolbook(a)
+    if len(a) < TOOM3_SQUARE_THRESHOLD:
+        return _poly_square_karatsuba(a)
+    return _poly_square_toom3(a)
+
+# Helper function: multiply two limb vectors
+@instrumented("limbs_mul", _operand_digits)
+def _limbs_mul(a, b):
+    """Multiplies two limb vectors and returns a normalized limb vector."""
+    return _carry(_poly_mul(a, b))
+
+# Helper function: square a limb vector
+@instrumented("limbs_square", _operand_digits)
+def _limbs_square(a):
+    """Squares a limb vector and returns a normalized limb vector."""
+    return _carry(_poly_square(a))
+
+# Helper function: long division of limb vectors
+@instrumented("limbs_divmod", _operand_digits)
+def _limbs_divmod(a, b):
+    """
+    Schoolbook long division of limb vectors (Knuth, TAOCP vol. 2, Algorithm D).
+    Each quotient limb is estimated from the two leading limbs of the running
+    remainder and corrected at most twice, so one pass yields both results.
+    Returns (quotient limbs, remainder limbs).
+    """
+    if len(b) == 1:
+        quotient, remainder = _limbs_divmod_small(a, b[0])
+        return quotient, [remainder]
+    if _limbs_compare(a, b) < 0:
+        return [0], a[:]
+
+    n = len(b)
+    m = len(a) - n
+
+    # Normalize so that the leading limb of the divisor is at least LIMB_BASE / 2
+    scale = LIMB_BASE // (b[-1] + 1)
+    v = _limbs_mul_small(b, scale)
+    u = _limbs_mul_small(a, scale)
+    u.extend([0] * (len(a) + 1 - len(u)))
+    v_top, v_next = v[-1], v[-2]
+
+    quotient = [0] * (m + 1)
+    for j in range(m, -1, -1):
+        # Estimate the quotient limb from the leading limbs
+        q_hat, r_hat = divmod(u[j + n] * LIMB_BASE + u[j + n - 1], v_top)
+        while q_hat >= LIMB_BASE or q_hat * v_next > r_hat * LIMB_BASE + u[j + n - 2]:
+            q_hat -= 1
+            r_hat += v_top
+            if r_hat >= LIMB_BASE:
+                break
+
+        # Multiply and subtract q_hat * v from the current window of u
+        carry = 0
+        borrow = 0
+        for i in range(n):
+            carry, low = divmod(q_hat * v[i] + carry, LIMB_BASE)
+            diff = u[i + j] - low - borrow
+            if diff < 0:
+                u[i + j] = diff + LIMB_BASE
+                borrow = 1
+            else:
+                u[i + j] = diff
+                borrow = 0
+        diff = u[j + n] - carry - borrow
+
+        if diff < 0:
+            # The estimate was one too large: add the divisor back
+            q_hat -= 1
+            carry = 0
+            for i in range(n):
+                total = u[i + j] + v[i] + carry
+                if total >= LIMB_BASE:
+                    u[i + j] = total - LIMB_BASE
+                    carry = 1
+                else:
+                    u[i + j] = total
+                    carry = 0
+            diff += carry
+        u[j + n] = diff
+        quotient[j] = q_hat
+
+    # Undo the normalization on the remainder
+    remainder, _ = _limbs_divmod_small(_strip_limbs(u[:n]), scale)
+    return _strip_limbs(quotient), remainder
+
+# Function to perform addition
+@instrumented("string_add")
+def string_add(num1, num2):
+    """
+    Adds two large positive numbers given as strings and returns the result as a string.
+    """
+    return _from_limbs(_limbs_add(_to_limbs(num1), _to_limbs(num2)))
 
 # Function to perform multiplication
+@instrumented("string_multiply")
 def string_multiply(num1, num2):
     """
-    Multiplies two large decimal numbers represented as strings using Karatsuba algorithm
-    and returns the result as a string.
+    Multiplies two large decimal numbers represented as strings and returns the result as a string.
+    Dispatches on operand size between schoolbook, Karatsuba and Toom-3 multiplication.
     """
     # Handle negative numbers
     is_negative = (num1[0] == '-') ^ (num2[0] == '-')  # XOR to determine if the result is negative
@@ -49,33 +415,21 @@ def string_multiply(num1, num2):
     if num2[0] == '-':
         num2 = num2[1:]  # Remove negative sign from num2
 
-    # Base case for recursion: if numbers are small, multiply directly
-    if len(num1) == 1 or len(num2) == 1:
-        result = str(int(num1) * int(num2))
-        return '-' + result if is_negative else result
-
-    # Make numbers the same length by padding with zeros
-    max_len = max(len(num1), len(num2))
-    num1 = num1.zfill(max_len)
-    num2 = num2.zfill(max_len)
-
-    # Find the middle point
-    mid = max_len // 2
-
-    # Split the numbers into high and low parts
-    high1, low1 = num1[:-mid], num1[-mid:]
-    high2, low2 = num2[:-mid], num2[-mid:]
-
-    # Recursively calculate three products
-    z0 = string_multiply(low1, low2)  # Low1 * Low2
-    z1 = string_multiply(str(int(low1) + int(high1)), str(int(low2) + int(high2)))  # (Low1 + High1) * (Low2 + High2)
-    z2 = string_multiply(high1, high2)  # High1 * High2
-
-    # Combine the results using Karatsuba's formula
-    result = int(z2) * 10**(2 * mid) + (int(z1) - int(z2) - int(z0)) * 10**mid + int(z0)
+    result = _from_limbs(_limbs_mul(_to_limbs(num1), _to_limbs(num2)))
 
     # Return result with correct sign
-    return '-' + str(result) if is_negative else str(result)
+    return '-' + result if is_negative and result != "0" else result
+
+# Function to perform squaring
+@instrumented("string_square")
+def string_square(num):
+    """
+    Squares a large decimal number represented as a string and returns the result as a string.
+    Cheaper than string_multiply(num, num) since every cross product is computed once.
+    """
+    if num[0] == '-':
+        num = num[1:]
+    return _from_limbs(_limbs_square(_to_limbs(num)))
 
 # Helper function for substraction: compare_abs
 def compare_abs(num1, num2):
@@ -99,40 +453,16 @@ def subtract_positive_large_numbers(num1, num2):
     Subtracts two large positive numbers given as strings (num1 - num2).
     Returns the result as a string.
     """
-    # Make sure num1 is the larger number
-    if compare_abs(num1, num2) == -1:
-        num1, num2 = num2, num1
-        sign = "-"
-    else:
-        sign = ""
+    a = _to_limbs(num1)
+    b = _to_limbs(num2)
 
-    # Reverse both numbers to subtract from least significant digit
-    num1 = num1[::-1]
-    num2 = num2[::-1]
-
-    result = []
-    borrow = 0
-
-    # Subtract digit by digit
-    for i in range(len(num1)):
-        digit1 = int(num1[i])
-        digit2 = int(num2[i]) if i < len(num2) else 0
-
-        # Perform the subtraction with borrowing
-        diff = digit1 - digit2 - borrow
-        if diff < 0:
-            diff += 10
-            borrow = 1
-        else:
-            borrow = 0
-
-        # Append result digit to the result list
-        result.append(str(diff))
-
-    # Remove any leading zeros and add sign if needed
-    return sign + ''.join(result[::-1]).lstrip("0") or "0"
+    # Make sure a is the larger number
+    if _limbs_compare(a, b) == -1:
+        return "-" + _from_limbs(_limbs_sub(b, a))
+    return _from_limbs(_limbs_sub(a, b))
 
 # Main function used to substract numbers
+@instrumented("subtract_large_numbers")
 def subtract_large_numbers(num1, num2):
     """
     Subtracts two large numbers with sign handling.
@@ -151,28 +481,27 @@ def subtract_large_numbers(num1, num2):
         # If both numbers are positive, perform standard subtraction
         return subtract_positive_large_numbers(num1, num2)
 
+# Function to perform division with remainder
+@instrumented("string_divmod")
+def string_divmod(dividend, divisor):
+    """
+    Performs integer division of two non-negative numbers represented as strings.
+    Returns the quotient and the remainder as strings, computed in a single pass.
+    """
+    if divisor.lstrip('0') == "":
+        raise ValueError("Division by zero is undefined.")
+
+    quotient, remainder = _limbs_divmod(_to_limbs(dividend), _to_limbs(divisor))
+    return _from_limbs(quotient), _from_limbs(remainder)
+
 # Function to perform division
+@instrumented("string_divide")
 def string_divide(dividend, divisor):
     """
     Performs integer division of two numbers represented as strings.
     Returns the quotient as a string.
     """
-    if divisor == "0":
-        raise ValueError("Division by zero is undefined.")
-
-    quotient = []
-    current = ""
-
-    for digit in dividend:
-        current += digit
-        current = current.lstrip('0') or "0"
-        q = 0
-        while len(current) > len(divisor) or (len(current) == len(divisor) and current >= divisor):
-            current = subtract_large_numbers(current, divisor)
-            q += 1
-        quotient.append(str(q))
-
-    return ''.join(quotient).lstrip('0') or "0"
+    return string_divmod(dividend, divisor)[0]
 
 # Helper function to check if a number is negative
 def is_negative(num_str):
@@ -180,68 +509,663 @@ def is_negative(num_str):
     return num_str.startswith('-')
 
 # Function to perform modulus operation
+@instrumented("string_mod")
 def string_mod(dividend, divisor):
     """Perform modulus operation where both numbers are strings. Returns the remainder as a string."""
-    remainder = ""  # Remainder as a string
-    
-    for digit in dividend:
-        # Add the next digit to the remainder
-        remainder += digit
+    return string_divmod(dividend, divisor)[1]
 
-        # Remove leading zeros from the remainder
-        remainder = remainder.lstrip('0') or "0"
+# Helper function: signed combination of two limb vectors
+def _limbs_combine(x, y, a, b):
+    """
+    Returns a*x + b*y for small integers a and b of opposite signs (or zero),
+    where the result is known to be non-negative.
+    """
+    if a >= 0 and b <= 0:
+        return _limbs_sub(_limbs_mul_small(x, a), _limbs_mul_small(y, -b))
+    return _limbs_sub(_limbs_mul_small(y, b), _limbs_mul_small(x, -a))
 
-        # Perform subtraction if the remainder is greater than or equal to the divisor
-        while compare_abs(remainder, divisor) >= 0:
-            remainder = subtract_large_numbers(remainder, divisor)
+# Helper function: extended GCD engine
+def _limbs_extended_gcd(a, m, cofactor=True):
+    """
+    Lehmer's extended Euclidean algorithm on limb vectors (Knuth, TAOCP vol. 2,
+    Algorithm L). Runs of Euclid steps are simulated on the two leading limbs
+    in single precision and applied to the full numbers as one 2x2 matrix;
+    a full division step is only taken when the leading limbs cannot decide
+    the next quotient.
+    Returns (g, t, negative) with g = gcd(a, m) and a * t * (-1)^negative = g (mod m).
+    With cofactor=False the cofactor is not tracked and t is None.
+    """
+    x, y = m, _limbs_divmod(a, m)[1]  # x plays the role of r, y of new_r
+    t_prev, t_cur = [0], [1]  # Cofactor magnitudes of x and y (signs alternate)
+    steps = 0  # Index of the Euclid remainder currently held in x
+
+    while y != [0]:
+        n = len(x)
+        if n >= 2 and len(y) >= n - 1:
+            # Simulate Euclid on the leading two limbs
+            x_hat = x[-1] * LIMB_BASE + x[-2]
+            y_hat = (y[n - 1] if len(y) == n else 0) * LIMB_BASE + y[n - 2]
+            A, B, C, D = 1, 0, 0, 1
+            k = 0
+            while y_hat + C != 0 and y_hat + D != 0:
+                q = (x_hat + A) // (y_hat + C)
+                if q != (x_hat + B) // (y_hat + D):
+                    break
+                A, C = C, A - q * C
+                B, D = D, B - q * D
+                x_hat, y_hat = y_hat, x_hat - q * y_hat
+                k += 1
+        else:
+            B = 0
+
+        if B == 0:
+            # The leading limbs could not determine a quotient: full division step
+            q, r = _limbs_divmod(x, y)
+            x, y = y, r
+            if cofactor:
+                t_prev, t_cur = t_cur, _limbs_add(t_prev, _limbs_mul(q, t_cur))
+            steps += 1
+        else:
+            x, y = _limbs_combine(x, y, A, B), _limbs_combine(x, y, C, D)
+            if cofactor:
+                t_prev, t_cur = (_limbs_add(_limbs_mul_small(t_prev, abs(A)), _limbs_mul_small(t_cur, abs(B))),
+                                 _limbs_add(_limbs_mul_small(t_prev, abs(C)), _limbs_mul_small(t_cur, abs(D))))
+            steps += k
+
+    if not cofactor:
+        return x, None, False
+    # The Euclid cofactors are 0, 1, -q1, ... : t_i is negative for even i >= 2
+    return x, t_prev, steps % 2 == 0
 
-    return remainder if remainder else "0"
+# Helper function: modular inverse on limbs
+def _limbs_mod_inverse(a, m):
+    """Returns the inverse of a modulo m as limbs, or None when gcd(a, m) != 1."""
+    if m == [1]:
+        return [0]
+    g, t, negative = _limbs_extended_gcd(a, m)
+    if g != [1]:
+        return None
+    t = _limbs_divmod(t, m)[1]
+    if negative and t != [0]:
+        t = _limbs_sub(m, t)
+    return t
+
+# Function to find the greatest common divisor
+@instrumented("string_gcd")
+def string_gcd(a, b):
+    """Computes gcd(a, b) of two non-negative string numbers with Lehmer's algorithm."""
+    a_limbs, b_limbs = _to_limbs(a), _to_limbs(b)
+    if b_limbs == [0]:
+        return _from_limbs(a_limbs)
+    return _from_limbs(_limbs_extended_gcd(a_limbs, b_limbs, cofactor=False)[0])
 
 # Function to find modular inverse
+@instrumented("string_mod_inverse")
 def string_mod_inverse(a, mod):
     """
-    Finds modular inverse of a under modulo mod using Extended Euclidean algorithm.
-    Operates entirely on strings for large numbers.
+    Finds modular inverse of a under modulo mod using the extended Euclidean algorithm
+    (Lehmer's variant). Operates entirely on strings for large numbers.
     """
-    t, new_t = "0", "1"  # Coefficients for Bézout's identity
-    r, new_r = mod, a  # Remainder terms
+    inverse = _limbs_mod_inverse(_to_limbs(a), _to_limbs(mod))
+    if inverse is None:
+        raise ValueError("a is not invertible under modulo mod")
+    return _from_limbs(inverse)
 
-    while new_r != "0":
-        # Compute quotient as string division
-        quotient = string_divide(r, new_r)
+# Function to find many modular inverses at once
+@instrumented("batch_mod_inverse")
+def batch_mod_inverse(values, mod):
+    """
+    Finds the modular inverses of all values under modulo mod with Montgomery's
+    trick: one inversion of the product of all values plus 3(N-1) modular
+    multiplications, instead of N inversions. Returns a list in input order.
+    """
+    values = list(values)
+    if not values:
+        return []
+    ctx = get_modulus_context(mod)
 
-        # Update t and new_t
-        t, new_t = new_t, subtract_large_numbers(t, string_multiply(quotient, new_t))
+    # prefix[i] = values[0] * ... * values[i] mod m
+    reduced = [ctx._reduce(_to_limbs(value)) for value in values]
+    prefix = [reduced[0]]
+    for value in reduced[1:]:
+        prefix.append(ctx._mulmod(prefix[-1], value))
 
-        # Update r and new_r
-        r, new_r = new_r, subtract_large_numbers(r, string_multiply(quotient, new_r))
+    inverse = _limbs_mod_inverse(prefix[-1], ctx._m)
+    if inverse is None:
+        raise ValueError("a value is not invertible under modulo mod")
 
-    # Check if gcd(a, mod) is 1
-    if r != "1":
-        raise ValueError("a is not invertible under modulo mod")
+    # Walk back: inverse holds (values[0] * ... * values[i])^-1
+    result = [None] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = _from_limbs(ctx._mulmod(inverse, prefix[i - 1]))
+        inverse = ctx._mulmod(inverse, reduced[i])
+    result[0] = _from_limbs(inverse)
+    return result
 
-    # Ensure t is positive
-    if is_negative(t):
-        t = t[1:]
-        t = subtract_large_numbers(mod, t)
+# Exponents are converted to binary once, into little-endian base 2^30 limbs
+BINARY_LIMB_BITS = 30
+BINARY_LIMB_MASK = (1 << BINARY_LIMB_BITS) - 1
 
-    return t
+# Below this many decimal limbs the conversion uses Horner's rule directly
+DECIMAL_TO_BINARY_THRESHOLD = 32
+
+# Sliding-window schedules kept for exponents that opt in with cache=True, such
+# as RSA e, d, dP and dQ. Ephemeral secrets are never cached: they would stay in
+# memory after use and push the long-lived schedules out.
+EXPONENT_CACHE_SIZE = 256
+
+# Helper function: propagate carries through a base 2^30 coefficient vector
+def _binary_carry(coeffs):
+    result = []
+    carry = 0
+    for coeff in coeffs:
+        carry += coeff
+        result.append(carry & BINARY_LIMB_MASK)
+        carry >>= BINARY_LIMB_BITS
+    while carry:
+        result.append(carry & BINARY_LIMB_MASK)
+        carry >>= BINARY_LIMB_BITS
+    return _strip_limbs(result)
+
+# Helper function: 10^(9 * 2^level) in base 2^30
+@lru_cache(maxsize=None)
+def _decimal_power_binary(level):
+    if level == 0:
+        return (LIMB_BASE,)  # 10^9 < 2^30
+    half = list(_decimal_power_binary(level - 1))
+    return tuple(_binary_carry(_poly_square(half)))
+
+# Helper function: convert decimal limbs to binary limbs
+def _decimal_to_binary(limbs):
+    """
+    Converts base 10^9 limbs to base 2^30 limbs by divide and conquer: the high
+    and low halves are converted separately and recombined as
+    high * 10^(9h) + low, with the powers 10^(9 * 2^level) built by repeated
+    squaring and cached. The multiplications use the subquadratic kernels.
+    """
+    n = len(limbs)
+    if n <= DECIMAL_TO_BINARY_THRESHOLD:
+        # Horner's rule: result = result * 10^9 + limb
+        result = [0]
+        for limb in reversed(limbs):
+            carry = limb
+            for i, coeff in enumerate(result):
+                carry += coeff * LIMB_BASE
+                result[i] = carry & BINARY_LIMB_MASK
+                carry >>= BINARY_LIMB_BITS
+            while carry:
+                result.append(carry & BINARY_LIMB_MASK)
+                carry >>= BINARY_LIMB_BITS
+        return _strip_limbs(result)
+
+    # Split at the largest power of two below n, so the power of 10 comes from the cache
+    level = (n - 1).bit_length() - 1
+    h = 1 << level
+    low = _decimal_to_binary(limbs[:h])
+    high = _decimal_to_binary(limbs[h:])
+    return _binary_carry(_poly_add(_poly_mul(high, list(_decimal_power_binary(level))), low))
+
+# Helper function: binary expansion of an exponent
+def _exponent_bits(exp):
+    """Returns the bits of a decimal string exponent, most significant first, as a tuple."""
+    binary = _decimal_to_binary(_to_limbs(exp))
+    bits = []
+    for limb in reversed(binary):
+        bits.extend((limb >> shift) & 1 for shift in range(BINARY_LIMB_BITS - 1, -1, -1))
+    first = bits.index(1) if 1 in bits else len(bits)
+    return tuple(bits[first:])
+
+# Helper function: sliding-window schedule of an exponent
+def _sliding_window_schedule(exp, window=None):
+    """
+    Splits an exponent into sliding windows. Returns (window, steps), where each
+    step (squarings, value) means: square the accumulator squarings times, then
+    multiply by base^value if value is nonzero. The first step starts the
+    accumulator at base^value; a final step with value 0 covers trailing zero bits.
+    """
+    bits = _exponent_bits(exp)
+    if window is None:
+        window = choose_window_size(len(bits))
+
+    steps = []
+    pending = 0  # Squarings owed for zero bits since the last window
+    i = 0
+    while i < len(bits):
+        if bits[i] == 0:
+            pending += 1
+            i += 1
+            continue
+
+        # Take the longest window starting at bit i that ends in a 1 bit
+        end = min(i + window, len(bits)) - 1
+        while bits[end] == 0:
+            end -= 1
+        value = 0
+        for bit in bits[i:end + 1]:
+            value = (value << 1) | bit
+        steps.append((pending + (end - i + 1) if steps else 0, value))
+        pending = 0
+        i = end + 1
+    if pending:
+        steps.append((pending, 0))
+    return window, tuple(steps)
+
+# Sliding-window schedules of long-lived exponents
+_cached_sliding_window_schedule = lru_cache(maxsize=EXPONENT_CACHE_SIZE)(_sliding_window_schedule)
+
+# Helper function: sliding-window schedule, from the cache only when asked for
+def _window_schedule(exp, window=None, cache=False):
+    if cache:
+        return _cached_sliding_window_schedule(exp, window)
+    return _sliding_window_schedule(exp, window)
+
+# Helper function: fixed-window schedule of an exponent
+def _fixed_window_schedule(exp, window):
+    """Returns (bit length, window values least significant first) for fixed windows of window bits."""
+    bits = _exponent_bits(exp)
+    values = []
+    for end in range(len(bits), 0, -window):
+        value = 0
+        for bit in bits[max(end - window, 0):end]:
+            value = (value << 1) | bit
+        values.append(value)
+    return len(bits), tuple(values)
+
+# Helper function: choose a sliding-window size
+def choose_window_size(exp_bits):
+    """
+    Picks the sliding-window size minimizing the number of multiplications
+    for an exponent with exp_bits bits.
+    """
+    if exp_bits <= 24:
+        return 1
+    if exp_bits <= 80:
+        return 3
+    if exp_bits <= 240:
+        return 4
+    if exp_bits <= 672:
+        return 5
+    return 6
+
+# Helper function: choose a window size for Shamir's trick
+def choose_dual_window_size(exp_bits):
+    """
+    Picks the joint window size for g^x * h^y. The table holds 4^window
+    products, so the window stays smaller than for a single exponentiation.
+    """
+    if exp_bits <= 40:
+        return 1
+    if exp_bits <= 300:
+        return 2
+    if exp_bits <= 800:
+        return 3
+    return 4
+
+# Reusable modulus context
+class ModulusContext:
+    """
+    Modular arithmetic under a fixed modulus using Barrett reduction.
+    The Barrett constant mu = floor(10^(18k) / modulus) is computed once, where k
+    is the number of limbs in the modulus, so every later reduction costs two
+    multiplications instead of a general division.
+    """
+
+    def __init__(self, modulus):
+        self._m = _to_limbs(modulus)
+        if self._m == [0]:
+            raise ValueError("Modulus must be positive.")
+        self.modulus = _from_limbs(self._m)
+        self._k = len(self._m)
+
+        # mu = floor(LIMB_BASE^(2k) / m)
+        power = [0] * (2 * self._k) + [1]
+        self._mu, _ = _limbs_divmod(power, self._m)
+
+    @classmethod
+    def from_precomputed(cls, modulus, mu):
+        """Rebuilds a context from the modulus and its saved Barrett constant mu (limbs), skipping the division."""
+        context = cls.__new__(cls)
+        context._m = _to_limbs(modulus)
+        if context._m == [0]:
+            raise ValueError("Modulus must be positive.")
+        context.modulus = _from_limbs(context._m)
+        context._k = len(context._m)
+        context._mu = list(mu)
+        return context
+
+    def to_precomputed(self):
+        """Returns (modulus, mu) such that from_precomputed(modulus, mu) rebuilds this context."""
+        return self.modulus, list(self._mu)
+
+    @instrumented("barrett_reduce", _operand_digits)
+    def _reduce(self, x):
+        """Reduces a limb vector modulo the context modulus."""
+        k = self._k
+        if len(x) > 2 * k:
+            return _limbs_divmod(x, self._m)[1]
+        if len(x) < k:
+            return x
+
+        # Estimate the quotient: q3 = floor(floor(x / b^(k-1)) * mu / b^(k+1))
+        q3 = _limbs_mul(x[k - 1:], self._mu)[k + 1:] or [0]
+
+        # r = (x - q3 * m) mod b^(k+1)
+        r1 = x[:k + 1]
+        r2 = _limbs_mul(q3, self._m)[:k + 1]
+        r = []
+        borrow = 0
+        for i in range(k + 1):
+            diff = (r1[i] if i < len(r1) else 0) - (r2[i] if i < len(r2) else 0) - borrow
+            if diff < 0:
+                r.append(diff + LIMB_BASE)
+                borrow = 1
+            else:
+                r.append(diff)
+                borrow = 0
+        _strip_limbs(r)
+
+        # At most two corrective subtractions are needed
+        while _limbs_compare(r, self._m) >= 0:
+            r = _limbs_sub(r, self._m)
+        return r
+
+    def _mulmod(self, a, b):
+        return self._reduce(_limbs_mul(a, b))
+
+    def _sqrmod(self, a):
+        return self._reduce(_limbs_square(a))
+
+    @instrumented("sliding_window_powmod", _operand_digits)
+    def _powmod(self, base, exp, window=None, cache=False):
+        """
+        Left-to-right sliding-window exponentiation on a reduced limb base with a
+        decimal string exponent. Only the odd powers base^1, base^3, ...,
+        base^(2^window - 1) are precomputed; each window of the exponent then
+        costs one multiplication on top of the squarings.
+        """
+        return self._multi_powmod([base], exp, window, cache)[0]
+
+    @instrumented("multi_powmod", _multi_powmod_digits)
+    def _multi_powmod(self, bases, exp, window=None, cache=False):
+        """
+        Sliding-window exponentiation of several reduced limb bases by one shared
+        exponent. The exponent's window schedule is computed once, and every
+        window is applied to all the bases in the same pass. With cache=True the
+        schedule is kept for later calls; use it only for long-lived exponents.
+        """
+        window, steps = _window_schedule(exp, window, cache)
+        if not steps:
+            return [[1] if self._m != [1] else [0] for _ in bases]
+
+        # Precompute odd powers of every base
+        tables = []
+        for base in bases:
+            odd_powers = [base]
+            if window > 1:
+                base_squared = self._sqrmod(base)
+                for _ in range((1 << (window - 1)) - 1):
+                    odd_powers.append(self._mulmod(odd_powers[-1], base_squared))
+            tables.append(odd_powers)
+
+        results = [odd_powers[steps[0][1] >> 1] for odd_powers in tables]
+        for squarings, value in steps[1:]:
+            for j, odd_powers in enumerate(tables):
+                result = results[j]
+                for _ in range(squarings):
+                    result = self._sqrmod(result)
+                if value:
+                    result = self._mulmod(result, odd_powers[value >> 1])
+                results[j] = result
+        return results
+
+    @instrumented("dual_powmod", _operand_digits)
+    def _dual_powmod(self, g, x, h, y, window=None):
+        """
+        Shamir's trick: g^x * h^y for reduced limb bases g and h in a single
+        left-to-right pass. Both exponents are read window bits at a time and a
+        table of every product g^i * h^j with i, j < 2^window replaces the two
+        separate multiplications, so the pair costs one chain of squarings.
+        """
+        x_bits, y_bits = _exponent_bits(x), _exponent_bits(y)
+        length = max(len(x_bits), len(y_bits))
+        if length == 0:
+            return [1] if self._m != [1] else [0]
+        if window is None:
+            window = choose_dual_window_size(length)
+
+        # Pad both exponents to the same whole number of windows
+        length += -length % window
+        x_bits = [0] * (length - len(x_bits)) + list(x_bits)
+        y_bits = [0] * (length - len(y_bits)) + list(y_bits)
+
+        # table[(i << window) | j] = g^i * h^j, with None standing for 1
+        size = 1 << window
+        g_powers, h_powers = [None, g], [None, h]
+        for _ in range(size - 2):
+            g_powers.append(self._mulmod(g_powers[-1], g))
+            h_powers.append(self._mulmod(h_powers[-1], h))
+        table = []
+        for g_power in g_powers:
+            for h_power in h_powers:
+                if g_power is None or h_power is None:
+                    table.append(g_power or h_power)
+                else:
+                    table.append(self._mulmod(g_power, h_power))
+
+        result = None
+        for start in range(0, length, window):
+            index = 0
+            for bit in x_bits[start:start + window]:
+                index = (index << 1) | bit
+            for bit in y_bits[start:start + window]:
+                index = (index << 1) | bit
+
+            if result is not None:
+                for _ in range(window):
+                    result = self._sqrmod(result)
+            entry = table[index]
+            if entry is not None:
+                result = entry if result is None else self._mulmod(result, entry)
+
+        if result is None:
+            return [1] if self._m != [1] else [0]
+        return result
+
+    def reduce(self, num):
+        """Returns num % modulus as a string."""
+        return _from_limbs(self._reduce(_to_limbs(num)))
+
+    def mulmod(self, a, b):
+        """Returns (a * b) % modulus as a string."""
+        return _from_limbs(self._mulmod(self._reduce(_to_limbs(a)), self._reduce(_to_limbs(b))))
+
+    def sqrmod(self, a):
+        """Returns (a * a) % modulus as a string."""
+        return _from_limbs(self._sqrmod(self._reduce(_to_limbs(a))))
+
+    def powmod(self, base, exp, window=None, cache=False):
+        """
+        Returns (base^exp) % modulus as a string.
+        window selects the sliding-window size in bits; None picks it from the exponent length.
+        cache=True keeps the exponent's window schedule for reuse (key exponents only, never ephemeral secrets).
+        """
+        return _from_limbs(self._powmod(self._reduce(_to_limbs(base)), exp, window, cache))
+
+    def multi_powmod(self, bases, exp, window=None, cache=False):
+        """Returns [(base^exp) % modulus for base in bases] as strings, sharing one pass over exp."""
+        reduced = [self._reduce(_to_limbs(base)) for base in bases]
+        return [_from_limbs(result) for result in self._multi_powmod(reduced, exp, window, cache)]
+
+    def dual_powmod(self, g, x, h, y, window=None):
+        """Returns (g^x * h^y) % modulus as a string using Shamir's trick."""
+        return _from_limbs(self._dual_powmod(self._reduce(_to_limbs(g)), x, self._reduce(_to_limbs(h)), y, window))
+
+# Contexts and fixed-base tables restored from precomputed data, keyed like the caches below
+_registered_contexts = {}
+_registered_fixed_bases = {}
+
+# Function to install a precomputed modulus context
+def register_modulus_context(context):
+    """Makes get_modulus_context return context for its modulus instead of building a new one."""
+    _registered_contexts[context.modulus] = context
+    get_modulus_context.cache_clear()
+
+# Function to get a cached modulus context
+@lru_cache(maxsize=64)
+def get_modulus_context(mod):
+    """Returns a ModulusContext for mod, reusing the one built on a previous call."""
+    context = _registered_contexts.get(mod.lstrip("0") or "0")
+    return context if context is not None else ModulusContext(mod)
+
+# Fixed-base exponentiation
+class FixedBaseExponentiation:
+    """
+    Exponentiation of a fixed base g modulo a fixed p using a precomputed table
+    of windowed powers (g^(j * 2^(window * i)) for every window position i and
+    every window value j). g^e is then a product of one table entry per nonzero
+    window of e, with no squarings at all.
+    Exponents longer than max_bits fall back to sliding-window exponentiation.
+    """
+
+    def __init__(self, g, p, window=4, max_bits=None):
+        self.context = get_modulus_context(p)
+        self.g = g
+        self.p = self.context.modulus
+        self.window = window
+        if max_bits is None:
+            max_bits = bit_length(self.p)
+        self.max_bits = max_bits
+
+        ctx = self.context
+        base = ctx._reduce(_to_limbs(g))
+        self._table = []
+        for _ in range((max_bits + window - 1) // window):
+            # row[j] = base^j for j in [1, 2^window)
+            row = [base]
+            for _ in range((1 << window) - 2):
+                row.append(ctx._mulmod(row[-1], base))
+            self._table.append(row)
+
+            # Move to the next window position: base^(2^window)
+            base = ctx._mulmod(row[-1], base)
+
+    @classmethod
+    def from_precomputed(cls, g, p, window, max_bits, table):
+        """Rebuilds a fixed-base table from saved rows of limb vectors, skipping the multiplications."""
+        if len(table) != (max_bits + window - 1) // window or any(len(row) != (1 << window) - 1 for row in table):
+            raise ValueError("Fixed-base table does not match its window and max_bits.")
+        fixed_base = cls.__new__(cls)
+        fixed_base.context = get_modulus_context(p)
+        fixed_base.g = g
+        fixed_base.p = fixed_base.context.modulus
+        fixed_base.window = window
+        fixed_base.max_bits = max_bits
+        fixed_base._table = [[list(entry) for entry in row] for row in table]
+        return fixed_base
+
+    def to_precomputed(self):
+        """Returns (g, p, window, max_bits, table) such that from_precomputed(*result) rebuilds this table."""
+        return self.g, self.p, self.window, self.max_bits, [[list(entry) for entry in row] for row in self._table]
+
+    @instrumented("fixed_base_powmod", _operand_digits)
+    def _powmod(self, exp):
+        bit_length, values = _fixed_window_schedule(exp, self.window)
+        if bit_length > self.max_bits:
+            return self.context._powmod(self.context._reduce(_to_limbs(self.g)), exp)
+
+        ctx = self.context
+        result = None
+        for position, value in enumerate(values):
+            if value:
+                entry = self._table[position][value - 1]
+                result = entry if result is None else ctx._mulmod(result, entry)
+
+        if result is None:
+            return [1] if ctx._m != [1] else [0]
+        return result
+
+    def powmod(self, exp):
+        """Returns (g^exp) % p as a string."""
+        return _from_limbs(self._powmod(exp))
+
+# Number of exponentiations with the same (g, p) after which a fixed-base table is built
+FIXED_BASE_THRESHOLD = 3
+
+_fixed_base_sightings = {}
+
+# Function to install a precomputed fixed-base table
+def register_fixed_base(fixed_base):
+    """Makes fixed_base_powmod and get_fixed_base use fixed_base for its (g, p) right away."""
+    _registered_fixed_bases[(fixed_base.g, fixed_base.p)] = fixed_base
+    get_fixed_base.cache_clear()
+
+# Function to get a cached fixed-base table
+@lru_cache(maxsize=16)
+def get_fixed_base(g, p):
+    """Returns a FixedBaseExponentiation for (g, p), reusing the one built on a previous call."""
+    fixed_base = _registered_fixed_bases.get((g, p))
+    return fixed_base if fixed_base is not None else FixedBaseExponentiation(g, p)
+
+# Helper function: count a sighting of (g, p) and report whether its table should be used
+def _use_fixed_base(g, p):
+    key = (g, p)
+    if key in _registered_fixed_bases:
+        return True
+    seen = _fixed_base_sightings.get(key, 0)
+    if seen >= FIXED_BASE_THRESHOLD:
+        return True
+    if len(_fixed_base_sightings) >= 1024:
+        _fixed_base_sightings.clear()
+    _fixed_base_sightings[key] = seen + 1
+    return seen + 1 >= FIXED_BASE_THRESHOLD
+
+# Function to perform exponentiation of a recurring base
+def fixed_base_powmod(g, exp, p):
+    """
+    Computes (g^exp) % p like string_modular_exponentiation, switching to a
+    precomputed fixed-base table once the same (g, p) pair has been seen
+    FIXED_BASE_THRESHOLD times. Intended for protocol generators.
+    """
+    if _use_fixed_base(g, p):
+        return get_fixed_base(g, p).powmod(exp)
+    return string_modular_exponentiation(g, exp, p)
+
+# Function to raise a recurring base and other bases to one exponent
+def fixed_base_multi_powmod(g, bases, exp, p):
+    """
+    Returns (g^exp % p, [base^exp % p for base in bases]). g^exp comes from the
+    fixed-base table once (g, p) recurs, as in fixed_base_powmod; until then all
+    the powers are computed in a single shared pass over exp.
+    """
+    ctx = get_modulus_context(p)
+    if _use_fixed_base(g, p):
+        return get_fixed_base(g, p).powmod(exp), [ctx.powmod(base, exp) for base in bases]
+    results = ctx.multi_powmod([g] + list(bases), exp)
+    return results[0], results[1:]
 
 # Function to perform modular exponentiation
-def string_modular_exponentiation(base, exp, mod):
-    """Computes (base^exp) % mod where base, exp, and mod are strings."""
-    result = "1"
-    base = string_mod(base, mod)  # Reduce base modulo mod
-    
-    while exp != "0":
-        if is_odd(exp):  # If the current exponent is odd
-            result = string_mod(string_multiply(result, base), mod)
-        base = string_mod(string_multiply(base, base), mod)  # Square the base
-        exp = string_divide_by_2(exp)  # Halve the exponent
-    
-    return result
+@instrumented("string_modular_exponentiation")
+def string_modular_exponentiation(base, exp, mod, window=None):
+    """
+    Computes (base^exp) % mod where base, exp, and mod are strings.
+    window sets the sliding-window size in bits; by default it is chosen from the exponent length.
+    """
+    return get_modulus_context(mod).powmod(base, exp, window)
+
+# Function to raise several bases to one exponent
+@instrumented("string_multi_modular_exponentiation")
+def string_multi_modular_exponentiation(bases, exp, mod, window=None):
+    """Computes [(base^exp) % mod for base in bases], scanning the exponent once for all bases."""
+    return get_modulus_context(mod).multi_powmod(bases, exp, window)
+
+# Function to compute a product of two powers
+@instrumented("string_dual_modular_exponentiation")
+def string_dual_modular_exponentiation(g, x, h, y, mod, window=None):
+    """Computes (g^x * h^y) % mod in a single pass with Shamir's trick."""
+    return get_modulus_context(mod).dual_powmod(g, x, h, y, window)
 
 # Function to perform division by 2
+@instrumented("string_divide_by_2")
 def string_divide_by_2(a):
     """Performs integer division of a string number by 2."""
     result = ""
@@ -257,61 +1181,152 @@ def is_odd(a):
     """Checks if the string number a is odd."""
     return int(a[-1]) % 2 != 0
 
-# Function to encode plaintext
-def encode_plaintext(plaintext):
-    """Encodes plaintext to a large number using symbolic arithmetic."""
-    plaintext_num = "0"
-    base = "256"
+# Function to find the bit length of a string number
+def bit_length(num_str):
+    """Returns the number of bits of the non-negative string number num_str (0 for "0")."""
+    binary = _decimal_to_binary(_to_limbs(num_str))
+    return (len(binary) - 1) * BINARY_LIMB_BITS + binary[-1].bit_length()
+
+# Function to reduce a string number by many small moduli
+def small_residues(num_str, moduli):
+    """Returns [num_str % m for m in moduli] as ints, for moduli below 10^9."""
+    limbs = _to_limbs(num_str)
+    return [_limbs_divmod_small(limbs, m)[1] for m in moduli]
 
-    for i, c in enumerate(plaintext):
-        ascii_val = str(ord(c))  # Convert ASCII value to string
-        power = string_modular_exponentiation(base, str(i), str(10**18))  # Calculate base^i
-        term = string_multiply(ascii_val, power)  # Multiply ASCII value by base^i
-        plaintext_num = string_add(plaintext_num, term)  # Add the term to the total
+# Function to split a string number into limbs
+def string_to_limbs(num_str):
+    """Returns the little-endian base 10^9 limbs of the non-negative string number num_str, e.g. for serialization."""
+    return _to_limbs(num_str)
 
-    return plaintext_num
+# Function to join limbs into a string number
+def limbs_to_string(limbs):
+    """Inverse of string_to_limbs: returns the decimal string of little-endian base 10^9 limbs."""
+    return _from_limbs(limbs)
+
+# Bytes are packed three at a time, so each Horner step multiplies the limbs by 2^24
+CODEC_CHUNK_BYTES = 3
+CODEC_CHUNK_BASE = 1 << (8 * CODEC_CHUNK_BYTES)
+
+# Separator between the numbers of a multi-block ciphertext
+BLOCK_SEPARATOR = ":"
+
+# Function to encode bytes
+@instrumented("encode_bytes")
+def encode_bytes(data):
+    """
+    Encodes a byte string to a large number, first byte least significant
+    (sum of data[i] * 256^i). The number is accumulated with Horner's rule
+    over limbs, three bytes per step, in a single pass.
+    """
+    limbs = [0]
+    top = len(data)
+    start = top - (top % CODEC_CHUNK_BYTES or CODEC_CHUNK_BYTES)
+    while top > 0:
+        # Little-endian value of data[start:top]
+        chunk = 0
+        for byte in reversed(data[start:top]):
+            chunk = (chunk << 8) | byte
+
+        # limbs = limbs * 256^(top - start) + chunk
+        multiplier = 1 << (8 * (top - start))
+        carry = chunk
+        for i in range(len(limbs)):
+            carry, limbs[i] = divmod(limbs[i] * multiplier + carry, LIMB_BASE)
+        while carry:
+            carry, low = divmod(carry, LIMB_BASE)
+            limbs.append(low)
+
+        top, start = start, start - CODEC_CHUNK_BYTES
+    return _from_limbs(_strip_limbs(limbs))
+
+# Function to decode bytes
+@instrumented("decode_bytes")
+def decode_bytes(num, length=None):
+    """
+    Decodes a number produced by encode_bytes back to bytes, peeling three bytes
+    per short division. Without length, high-order zero bytes are dropped.
+    """
+    limbs = _to_limbs(num)
+    data = bytearray()
+    while limbs != [0]:
+        limbs, chunk = _limbs_divmod_small(limbs, CODEC_CHUNK_BASE)
+        for _ in range(CODEC_CHUNK_BYTES):
+            data.append(chunk & 0xFF)
+            chunk >>= 8
+
+    while data and data[-1] == 0:
+        data.pop()
+    if length is not None:
+        if len(data) > length:
+            raise ValueError("Encoded number does not fit in the requested length.")
+        data.extend(bytes(length - len(data)))
+    return bytes(data)
+
+# Byte appended to every encoded message. It keeps the final block's high byte
+# nonzero, so trailing zero bytes of the message survive decoding.
+END_OF_MESSAGE = b"\x01"
+
+# Helper function: strip the end-of-message marker
+def _strip_end_marker(data):
+    if not data.endswith(END_OF_MESSAGE):
+        raise ValueError("Decoded data is missing the end-of-message marker.")
+    return data[:-len(END_OF_MESSAGE)]
+
+# Function to encode plaintext
+def encode_plaintext(plaintext):
+    """Encodes plaintext (UTF-8) to a large number using symbolic arithmetic."""
+    return encode_bytes(plaintext.encode("utf-8") + END_OF_MESSAGE)
 
 # Function to decode plaintext
 def decode_plaintext(plaintext_num):
     """Decodes a large number back into plaintext using symbolic arithmetic."""
-    base = "256"
-    plaintext = []
-
-    while plaintext_num != "0":
-        char_val = string_mod(plaintext_num, base)  # Get remainder mod 256
-        plaintext.append(chr(int(char_val)))  # Convert to character
-        plaintext_num = string_divide(plaintext_num, base)  # Divide by 256
+    return _strip_end_marker(decode_bytes(plaintext_num)).decode("utf-8")
 
-    return ''.join(plaintext)
+# Function to get the plaintext block size for a modulus
+def plaintext_block_size(modulus):
+    """
+    Returns the number of bytes k such that every k-byte block encodes below modulus,
+    i.e. the largest k with 256^k <= 10^(digits - 1).
+    """
+    digits = len(modulus.lstrip('0'))
+    block_size = int((digits - 1) / math.log10(256))
+    if block_size < 1:
+        raise ValueError("Modulus is too small to carry a plaintext block.")
+    return block_size
 
-# Helper function: Modular inverse using Extended Euclidean Algorithm
-def extended_euclid_string(a, b):
-    """ Extended Euclidean Algorithm with string-based arithmetic to find modular inverse. """
-    # Initial values for coefficients
-    x0, x1 = "1", "0"  # Coefficients of a
-    y0, y1 = "0", "1"  # Coefficients of b
-    b_original = b
+# Function to encode bytes in blocks
+def encode_bytes_blocks(data, modulus):
+    """
+    Encodes a byte string into a list of numbers, each below modulus. The data is
+    followed by END_OF_MESSAGE before it is split, so the exact bytes, including
+    trailing zeros, come back from decode_bytes_blocks.
+    """
+    data = bytes(data) + END_OF_MESSAGE
+    block_size = plaintext_block_size(modulus)
+    return [encode_bytes(data[i:i + block_size]) for i in range(0, len(data), block_size)]
 
-    while b != "0":
-        # Calculate a // b and a % b as strings
-        quotient = string_divide(a, b)
-        remainder = string_mod(a, b)
+# Function to decode bytes from blocks
+def decode_bytes_blocks(blocks, modulus):
+    """Decodes numbers produced by encode_bytes_blocks back into the original bytes."""
+    block_size = plaintext_block_size(modulus)
+    data = b''.join(decode_bytes(block, block_size) for block in blocks[:-1])
+    return _strip_end_marker(data + decode_bytes(blocks[-1]))
 
-        # Update a and b for the next iteration
-        a, b = b, remainder
+# Function to encode plaintext in blocks
+def encode_plaintext_blocks(plaintext, modulus):
+    """Encodes a plaintext string (as UTF-8) into a list of numbers, each below modulus."""
+    return encode_bytes_blocks(plaintext.encode("utf-8"), modulus)
 
-        # Update x and y based on the quotient
-        x0, x1 = x1, subtract_large_numbers(x0, string_multiply(quotient, x1))
-        y0, y1 = y1, subtract_large_numbers(y0, string_multiply(quotient, y1))
+# Function to decode plaintext from blocks
+def decode_plaintext_blocks(blocks, modulus):
+    """Decodes numbers produced by encode_plaintext_blocks back into plaintext."""
+    return decode_bytes_blocks(blocks, modulus).decode("utf-8")
 
-    # Final GCD is a; check if modular inverse exists
-    if a != "1":
+# Helper function: Modular inverse using Extended Euclidean Algorithm
+@instrumented("extended_euclid_string")
+def extended_euclid_string(a, b):
+    """ Extended Euclidean Algorithm with string-based arithmetic to find modular inverse. """
+    inverse = _limbs_mod_inverse(_to_limbs(a), _to_limbs(b))
+    if inverse is None:
         raise ValueError("a is not invertible under modulo b (gcd(a, b) != 1)")
-
-    # Ensure x0 is positive
-    if is_negative(x0):
-        # x0 = string_add(x0, b_original)  # b_original is the original modulus
-        x0 = x0[1:]
-        x0 = subtract_large_numbers(b_original, x0)
-
-    return x0
\ No newline at end of file
+    return _from_limbs(inverse)